@@ -8,6 +8,11 @@ import json
 import sqlite3
 import os
 import random
+import itertools
+import re
+import sys
+
+from dataset_io import compile_format, compile_param_sql, format_result, format_row, write_json_array
 
 random.seed(42)
 
@@ -15,42 +20,177 @@ BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
 DATABASE_PATH = os.path.join(BASE_DIR, "data", "database", "chichewa_text2sql.db")
 TRAIN_PATH = os.path.join(BASE_DIR, "data", "train", "train.json")
 CORRECTED_PATH = os.path.join(BASE_DIR, "data", "train", "train_corrected.json")
+DISTINCT_CACHE_PATH = os.path.join(BASE_DIR, "data", "database", "distinct_cache.json")
 
 TARGET_PER_TABLE = 80
+# Generated candidates returning more rows than this are rejected rather than stored truncated
+MAX_RESULT_ROWS = 200
+
+# Formatted results of generated SQL that already passed validation, keyed by SQL text
+_fmt_cache = {}
+# (parameterized SQL, args) pairs already rejected, so failing combinations never run twice
+_rejected = set()
 
 conn = sqlite3.connect(DATABASE_PATH)
+# Read-only workload: keep more pages hot and run every SELECT in one explicit transaction
+conn.isolation_level = None
 cursor = conn.cursor()
+cursor.arraysize = 100
+cursor.execute("PRAGMA cache_size=-65536")
+cursor.execute("PRAGMA temp_store=MEMORY")
+cursor.execute("PRAGMA query_only=1")
+cursor.execute("BEGIN")
+
+def validate_sql(sql):
+    """Execute `sql` on the shared cursor; return (success, formatted result)."""
+    try:
+        # Format straight off the cursor instead of building a fetchall() list first
+        return True, format_result(cursor.execute(sql))
+    except sqlite3.Error:
+        return False, format_result(None)
 
-def execute_sql(sql):
+def exec_and_format(sql, params=()):
+    """Execute `sql` and return its formatted result when the first value is non-null, else None.
+
+    Rows are formatted as they are read off the cursor. Rejected candidates stop after the
+    first row, and results longer than MAX_RESULT_ROWS are rejected rather than truncated.
+    """
+    try:
+        cursor.execute(sql, params)
+        first = cursor.fetchone()
+        if first is None or first[0] is None:
+            return None
+        parts = [format_row(first)]
+        for row in cursor:
+            if len(parts) == MAX_RESULT_ROWS:
+                return None
+            parts.append(format_row(row))
+    except sqlite3.Error:
+        return None
+    return "[" + ", ".join(parts) + "]"
+
+def load_distinct_cache():
+    # The cache is optional: a missing, unreadable or stale file just means starting empty
     try:
-        cursor.execute(sql)
-        return True, cursor.fetchall(), None
-    except sqlite3.Error as e:
-        return False, None, str(e)
-
-def format_as_tuples(result):
-    if result is None or not result:
-        return "[]"
-    formatted = []
-    for row in result:
-        formatted_row = []
-        for val in row:
-            if isinstance(val, float):
-                formatted_row.append(round(val, 2))
-            else:
-                formatted_row.append(val)
-        formatted.append(tuple(formatted_row))
-    return str(formatted)
+        with open(DISTINCT_CACHE_PATH, 'r', encoding='utf-8') as f:
+            cache = json.load(f)
+    except (OSError, ValueError):
+        return {}
+    if not isinstance(cache, dict) or cache.get('db_mtime') != _db_mtime:
+        return {}
+    values = cache.get('values')
+    return values if isinstance(values, dict) else {}
+
+# Distinct-value lookups persist across runs as JSON; the DB mtime invalidates them on change
+_db_mtime = os.path.getmtime(DATABASE_PATH)
+_distinct_cache = load_distinct_cache()
 
 def get_distinct(table, column, limit=50):
+    key = f"{table}.{column}.{limit}"
+    if key in _distinct_cache:
+        return _distinct_cache[key]
     try:
         cursor.execute(f"SELECT DISTINCT {column} FROM {table} WHERE {column} IS NOT NULL LIMIT {limit}")
-        return [r[0] for r in cursor.fetchall()]
+        values = [r[0] for r in cursor]
     except:
         return []
+    _distinct_cache[key] = values
+    return values
+
+def save_distinct_cache():
+    try:
+        with open(DISTINCT_CACHE_PATH, 'w', encoding='utf-8') as f:
+            json.dump({'db_mtime': _db_mtime, 'values': _distinct_cache}, f, ensure_ascii=False)
+    except OSError:
+        pass
+
+def key_hash(question, sql):
+    """Fingerprint a normalized (question, sql) pair as a single int for the dedup set."""
+    return hash((question.strip().lower(), sql.strip()))
 
 def get_instance_key(inst):
-    return (inst['question_en'].strip().lower(), inst['sql_statement'].strip())
+    return key_hash(inst['question_en'], inst['sql_statement'])
+
+def prepare_templates(templates):
+    """Attach compiled renderers and a `?`-placeholder form of each template's SQL.
+
+    The rendered SQL is still what gets stored as `sql_statement`, but execution goes
+    through the parameterized form so SQLite can reuse its compiled statement.
+    """
+    for template in templates:
+        template["q_en_fn"] = compile_format(template["q_en"])
+        template["q_ny_fn"] = compile_format(template["q_ny"])
+        template["sql_fn"] = compile_format(template["sql"])
+        template["sql_param"], fields = compile_param_sql(template["sql"])
+        template["params"] = tuple(name for name, _ in fields)
+        template["sql_fields"] = tuple(dict.fromkeys(template["params"]))
+    return templates
+
+_WS_RX = re.compile(r'[ \t\n\r]*')
+_NUMBER_TAIL_RX = re.compile(r'[0-9.eE+-]*')
+
+def iter_json_array(path, chunk_size=1 << 16):
+    """Yield the items of a top-level JSON array one at a time as they are decoded.
+
+    The file is read in `chunk_size` pieces and decoded items are dropped from the buffer,
+    so memory holds one chunk plus the item being decoded rather than the whole file.
+    Malformed input (missing or extra commas, a missing `]`, trailing data) raises
+    JSONDecodeError like json.load would; error positions count from the current buffer.
+    """
+    decoder = json.JSONDecoder()
+    with open(path, 'r', encoding='utf-8') as f:
+        buf = ''
+        eof = False
+
+        def fill():
+            nonlocal buf, eof
+            chunk = f.read(chunk_size)
+            eof = not chunk
+            buf += chunk
+            return not eof
+
+        def skip_ws(pos):
+            # Whitespace may run to the end of the buffer; keep reading until it doesn't
+            while True:
+                pos = _WS_RX.match(buf, pos).end()
+                if pos < len(buf) or eof or not fill():
+                    return pos
+
+        def decode(pos):
+            while True:
+                try:
+                    item, end = decoder.raw_decode(buf, pos)
+                except json.JSONDecodeError:
+                    if eof or not fill():
+                        raise
+                    continue
+                # A number cut at the buffer edge ("-2" of "-2.5") decodes as a shorter number;
+                # read on while only number characters follow it
+                if isinstance(item, (str, list, dict)) or _NUMBER_TAIL_RX.match(buf, end).end() < len(buf):
+                    return item, end
+                if eof or not fill():
+                    return item, end
+
+        pos = skip_ws(0)
+        if buf[pos:pos + 1] != '[':
+            raise json.JSONDecodeError("Expecting '['", buf, pos)
+        pos = skip_ws(pos + 1)
+        if buf[pos:pos + 1] != ']':
+            while True:
+                item, pos = decode(pos)
+                yield item
+                # Drop what has been decoded so the buffer never grows past the current item
+                buf, pos = buf[pos:], 0
+                pos = skip_ws(pos)
+                sep = buf[pos:pos + 1]
+                if sep == ']':
+                    break
+                if sep != ',':
+                    raise json.JSONDecodeError("Expecting ',' delimiter", buf, pos)
+                pos = skip_ws(pos + 1)
+        pos = skip_ws(pos + 1)
+        if pos < len(buf):
+            raise json.JSONDecodeError("Extra data", buf, pos)
 
 # ============================================================================
 # LOAD VALID INSTANCES FROM TRAIN.JSON
@@ -60,9 +200,6 @@ print("BUILDING COMPLETE CORRECTED DATASET")
 print("=" * 70)
 
 print("\n[1] Loading train.json and extracting valid instances...")
-with open(TRAIN_PATH, 'r', encoding='utf-8') as f:
-    train_data = json.load(f)
-
 valid_by_table = {
     'production': [],
     'population': [],
@@ -71,22 +208,30 @@ valid_by_table = {
     'mse_daily': []
 }
 existing_keys = set()
-
-for inst in train_data:
-    success, result, _ = execute_sql(inst['sql_statement'])
+# Templated rows often repeat the same SQL; execute and format each distinct statement once
+sql_to_result = {}
+
+for inst in iter_json_array(TRAIN_PATH):
+    key = get_instance_key(inst)
+    if key in existing_keys:
+        continue
+    sql = inst['sql_statement']
+    if sql not in sql_to_result:
+        sql_to_result[sql] = validate_sql(sql)
+    success, sql_result = sql_to_result[sql]
     if success:
-        key = get_instance_key(inst)
-        if key not in existing_keys:
-            corrected = {
-                "question_en": inst['question_en'],
-                "question_ny": inst['question_ny'],
-                "sql_statement": inst['sql_statement'],
-                "sql_result": format_as_tuples(result),
-                "difficulty_level": inst['difficulty_level'],
-                "table": inst['table']
-            }
-            valid_by_table[inst['table']].append(corrected)
-            existing_keys.add(key)
+        # Each decoded record carries its own copy of these few values; share one string each
+        table = sys.intern(inst['table'])
+        corrected = {
+            "question_en": inst['question_en'],
+            "question_ny": inst['question_ny'],
+            "sql_statement": sql,
+            "sql_result": sql_result,
+            "difficulty_level": sys.intern(inst['difficulty_level']),
+            "table": table
+        }
+        valid_by_table[table].append(corrected)
+        existing_keys.add(key)
 
 print("Valid instances from train.json:")
 for t, instances in valid_by_table.items():
@@ -96,53 +241,93 @@ for t, instances in valid_by_table.items():
 # GENERATE ADDITIONAL INSTANCES FOR TABLES THAT NEED THEM
 # ============================================================================
 
-def generate_and_add(table, templates, params_fn, target_count, existing):
-    """Generate instances until we reach target_count."""
-    current = existing.copy()
-    keys = {get_instance_key(i) for i in current}
+def iter_candidates(templates, pools, block=500):
+    """Yield (template, params) pairs forever, drawing samples in bulk blocks.
+
+    `pools` maps each template placeholder to the values it is sampled from.
+    """
+    names = list(pools)
+    while True:
+        template_draws = random.choices(templates, k=block)
+        param_draws = [random.choices(pools[name], k=block) for name in names]
+        for template, *values in zip(template_draws, *param_draws):
+            yield template, dict(zip(names, values))
+
+def generate_all(tables, target_count, valid_by_table, keys):
+    """Generate instances until every table reaches target_count.
+
+    `tables` maps each table name to its (templates, pools) pair. All tables share one
+    attempt budget and each attempt goes to a table weighted by how many instances it
+    still needs, so tables that fill quickly stop consuming attempts.
+    `keys` holds the instance key hashes already taken and is updated in place.
+    """
+    current = {table: valid_by_table[table].copy() for table in tables}
+    remaining = {table: target_count - len(current[table]) for table in tables if len(current[table]) < target_count}
+    candidates = {table: iter_candidates(*tables[table]) for table in remaining}
     attempts = 0
-    max_attempts = 5000
-    
-    while len(current) < target_count and attempts < max_attempts:
+    max_attempts = 5000 * len(tables)
+    # Table list and cumulative weights only change when an instance is accepted
+    open_tables = cum_weights = None
+
+    while remaining and attempts < max_attempts:
         attempts += 1
-        template = random.choice(templates)
-        params = params_fn()
+        if open_tables is None:
+            open_tables = list(remaining)
+            cum_weights = list(itertools.accumulate(remaining.values()))
+        table = random.choices(open_tables, cum_weights=cum_weights)[0]
+        template, params = next(candidates[table])
         
         try:
-            q_en = template["q_en"].format(**params)
-            q_ny = template["q_ny"].format(**params)
-            sql = template["sql"].format(**params)
-        except KeyError:
+            q_en = template["q_en_fn"](**params)
+            q_ny = template["q_ny_fn"](**params)
+            args = tuple(params[k] for k in template["params"])
+            # Escape quotes so the stored SQL stays valid for values like "TA M'Mbelwa"
+            sql_args = {k: params[k] for k in template["sql_fields"]}
+            sql = template["sql_fn"](**{k: v.replace("'", "''") if isinstance(v, str) else v for k, v in sql_args.items()})
+        except (KeyError, TypeError):
             continue
         
-        key = (q_en.strip().lower(), sql.strip())
+        key = key_hash(q_en, sql)
         if key in keys:
             continue
         
-        success, result, _ = execute_sql(sql)
-        if success and result and result[0][0] is not None:
-            inst = {
-                "question_en": q_en,
-                "question_ny": q_ny,
-                "sql_statement": sql,
-                "sql_result": format_as_tuples(result),
-                "difficulty_level": template["diff"],
-                "table": table
-            }
-            current.append(inst)
-            keys.add(key)
+        sql_result = _fmt_cache.get(sql)
+        if sql_result is None:
+            exec_key = (template["sql_param"], args)
+            if exec_key in _rejected:
+                continue
+            sql_result = exec_and_format(*exec_key)
+            if sql_result is None:
+                _rejected.add(exec_key)
+                continue
+            _fmt_cache[sql] = sql_result
+
+        inst = {
+            "question_en": q_en,
+            "question_ny": q_ny,
+            "sql_statement": sql,
+            "sql_result": sql_result,
+            "difficulty_level": template["diff"],
+            "table": table
+        }
+        current[table].append(inst)
+        keys.add(key)
+        remaining[table] -= 1
+        if not remaining[table]:
+            del remaining[table]
+        open_tables = None
     
-    return current[:target_count]
+    return {table: instances[:target_count] for table, instances in current.items()}
 
 # ============================================================================
 # PRODUCTION TEMPLATES
 # ============================================================================
-print("\n[2] Filling production table...")
+print("\n[2] Preparing production templates...")
 prod_districts = get_distinct('production', 'district')
 prod_crops = get_distinct('production', 'crop')
 prod_seasons = get_distinct('production', 'season')
 
-prod_templates = [
+prod_templates = prepare_templates([
     {"q_en": "How much {crop} was produced in {district}?", "q_ny": "Ndi {crop} ochuluka bwanji adakololedwa ku {district}?", "sql": "SELECT yield FROM production WHERE district = '{district}' AND crop = '{crop}';", "diff": "easy"},
     {"q_en": "What was the total {crop} yield in {season}?", "q_ny": "Ndi {crop} ochuluka bwanji adakololedwa mu {season}?", "sql": "SELECT SUM(yield) FROM production WHERE crop = '{crop}' AND season = '{season}';", "diff": "easy"},
     {"q_en": "Which district produced the most {crop}?", "q_ny": "Ndi boma liti lomwe lidakolola {crop} kwambiri?", "sql": "SELECT district FROM production WHERE crop = '{crop}' ORDER BY yield DESC LIMIT 1;", "diff": "medium"},
@@ -153,24 +338,19 @@ prod_templates = [
     {"q_en": "How many districts grow {crop}?", "q_ny": "Ndi maboma angati omwe amabzala {crop}?", "sql": "SELECT COUNT(DISTINCT district) FROM production WHERE crop = '{crop}';", "diff": "medium"},
     {"q_en": "Top 5 crops in {district} by yield", "q_ny": "Mbewu 5 zapamwamba ku {district}", "sql": "SELECT crop, yield FROM production WHERE district = '{district}' ORDER BY yield DESC LIMIT 5;", "diff": "medium"},
     {"q_en": "Total yield in {district}", "q_ny": "Zokolola zonse ku {district}", "sql": "SELECT SUM(yield) FROM production WHERE district = '{district}';", "diff": "easy"},
-]
+])
 
-valid_by_table['production'] = generate_and_add(
-    'production', prod_templates,
-    lambda: {'district': random.choice(prod_districts), 'crop': random.choice(prod_crops), 'season': random.choice(prod_seasons)},
-    TARGET_PER_TABLE, valid_by_table['production']
-)
-print(f"  production: {len(valid_by_table['production'])}")
+prod_pools = {'district': prod_districts, 'crop': prod_crops, 'season': prod_seasons}
 
 # ============================================================================
 # POPULATION TEMPLATES
 # ============================================================================
-print("\n[3] Filling population table...")
+print("\n[3] Preparing population templates...")
 pop_districts = get_distinct('population', 'district_name')
 pop_regions = get_distinct('population', 'region_name')
 pop_tas = get_distinct('population', 'ta_name', limit=30)
 
-pop_templates = [
+pop_templates = prepare_templates([
     {"q_en": "What is the total population in {district}?", "q_ny": "Ndi anthu angati ku {district}?", "sql": "SELECT SUM(CAST(total_population AS INTEGER)) FROM population WHERE district_name = '{district}';", "diff": "easy"},
     {"q_en": "How many males in {district}?", "q_ny": "Ndi amuna angati ku {district}?", "sql": "SELECT SUM(population_male) FROM population WHERE district_name = '{district}';", "diff": "easy"},
     {"q_en": "How many females in {district}?", "q_ny": "Ndi akazi angati ku {district}?", "sql": "SELECT SUM(population_female) FROM population WHERE district_name = '{district}';", "diff": "easy"},
@@ -181,23 +361,18 @@ pop_templates = [
     {"q_en": "Population of TA {ta}?", "q_ny": "Anthu ku TA {ta}?", "sql": "SELECT SUM(CAST(total_population AS INTEGER)) FROM population WHERE ta_name = '{ta}';", "diff": "medium"},
     {"q_en": "List TAs in {district}", "q_ny": "Mafumu ku {district}", "sql": "SELECT DISTINCT ta_name FROM population WHERE district_name = '{district}';", "diff": "easy"},
     {"q_en": "Districts count in {region}", "q_ny": "Maboma m'chigawo cha {region}", "sql": "SELECT COUNT(DISTINCT district_name) FROM population WHERE region_name = '{region}';", "diff": "easy"},
-]
+])
 
-valid_by_table['population'] = generate_and_add(
-    'population', pop_templates,
-    lambda: {'district': random.choice(pop_districts) if pop_districts else 'Lilongwe', 'region': random.choice(pop_regions) if pop_regions else 'Central', 'ta': random.choice(pop_tas) if pop_tas else 'Kabudula'},
-    TARGET_PER_TABLE, valid_by_table['population']
-)
-print(f"  population: {len(valid_by_table['population'])}")
+pop_pools = {'district': pop_districts or ['Lilongwe'], 'region': pop_regions or ['Central'], 'ta': pop_tas or ['Kabudula']}
 
 # ============================================================================
 # FOOD INSECURITY TEMPLATES
 # ============================================================================
-print("\n[4] Filling food_insecurity table...")
+print("\n[4] Preparing food_insecurity templates...")
 fi_districts = get_distinct('food_insecurity', 'district')
 fi_levels = get_distinct('food_insecurity', 'insecurity_level')
 
-fi_templates = [
+fi_templates = prepare_templates([
     {"q_en": "Food insecurity level in {district}?", "q_ny": "Mlingo wa kusowa chakudya ku {district}?", "sql": "SELECT insecurity_level FROM food_insecurity WHERE district = '{district}';", "diff": "easy"},
     {"q_en": "Analyzed population in {district}?", "q_ny": "Anthu owunikiridwa ku {district}?", "sql": "SELECT analyzed_population FROM food_insecurity WHERE district = '{district}';", "diff": "easy"},
     {"q_en": "Food insecurity percentage in {district}?", "q_ny": "Peresenti ya kusowa chakudya ku {district}?", "sql": "SELECT percentage_population FROM food_insecurity WHERE district = '{district}';", "diff": "easy"},
@@ -210,26 +385,21 @@ fi_templates = [
     {"q_en": "Insecurity description for {district}?", "q_ny": "Kufotokoza kwa {district}?", "sql": "SELECT insecurity_desc_short FROM food_insecurity WHERE district = '{district}';", "diff": "easy"},
     {"q_en": "Districts with percentage above 20?", "q_ny": "Maboma opitilira 20%?", "sql": "SELECT district, percentage_population FROM food_insecurity WHERE percentage_population > 20;", "diff": "hard"},
     {"q_en": "Count of critical districts?", "q_ny": "Maboma oopsa?", "sql": "SELECT COUNT(*) FROM food_insecurity WHERE insecurity_level >= 3;", "diff": "medium"},
-]
+])
 
-valid_by_table['food_insecurity'] = generate_and_add(
-    'food_insecurity', fi_templates,
-    lambda: {'district': random.choice(fi_districts) if fi_districts else 'Lilongwe', 'level': random.choice(fi_levels) if fi_levels else 1},
-    TARGET_PER_TABLE, valid_by_table['food_insecurity']
-)
-print(f"  food_insecurity: {len(valid_by_table['food_insecurity'])}")
+fi_pools = {'district': fi_districts or ['Lilongwe'], 'level': fi_levels or [1]}
 
 # ============================================================================
 # COMMODITY PRICES TEMPLATES
 # ============================================================================
-print("\n[5] Filling commodity_prices table...")
+print("\n[5] Preparing commodity_prices templates...")
 cp_districts = get_distinct('commodity_prices', 'district')
 cp_markets = get_distinct('commodity_prices', 'market')
 cp_commodities = get_distinct('commodity_prices', 'commodity')
 cp_months = get_distinct('commodity_prices', 'month_name')
 cp_years = get_distinct('commodity_prices', 'year')
 
-cp_templates = [
+cp_templates = prepare_templates([
     {"q_en": "Price of {commodity} in {market}?", "q_ny": "Mtengo wa {commodity} ku {market}?", "sql": "SELECT price FROM commodity_prices WHERE commodity = '{commodity}' AND market = '{market}' LIMIT 1;", "diff": "easy"},
     {"q_en": "Average price of {commodity} in {district}?", "q_ny": "Mtengo pakatikati wa {commodity} ku {district}?", "sql": "SELECT AVG(price) FROM commodity_prices WHERE commodity = '{commodity}' AND district = '{district}';", "diff": "medium"},
     {"q_en": "Markets in {district}?", "q_ny": "Misika ku {district}?", "sql": "SELECT DISTINCT market FROM commodity_prices WHERE district = '{district}';", "diff": "easy"},
@@ -240,25 +410,20 @@ cp_templates = [
     {"q_en": "Records in {year}?", "q_ny": "Malembedwe mu {year}?", "sql": "SELECT COUNT(*) FROM commodity_prices WHERE year = {year};", "diff": "easy"},
     {"q_en": "Commodities count in {district}?", "q_ny": "Mitundu ku {district}?", "sql": "SELECT COUNT(DISTINCT commodity) FROM commodity_prices WHERE district = '{district}';", "diff": "easy"},
     {"q_en": "EPA for {market}?", "q_ny": "EPA ya {market}?", "sql": "SELECT DISTINCT epa_name FROM commodity_prices WHERE market = '{market}';", "diff": "easy"},
-]
+])
 
-valid_by_table['commodity_prices'] = generate_and_add(
-    'commodity_prices', cp_templates,
-    lambda: {'district': random.choice(cp_districts), 'market': random.choice(cp_markets), 'commodity': random.choice(cp_commodities), 'month': random.choice(cp_months), 'year': random.choice(cp_years)},
-    TARGET_PER_TABLE, valid_by_table['commodity_prices']
-)
-print(f"  commodity_prices: {len(valid_by_table['commodity_prices'])}")
+cp_pools = {'district': cp_districts, 'market': cp_markets, 'commodity': cp_commodities, 'month': cp_months, 'year': cp_years}
 
 # ============================================================================
 # MSE DAILY TEMPLATES
 # ============================================================================
-print("\n[6] Filling mse_daily table...")
+print("\n[6] Preparing mse_daily templates...")
 mse_tickers = get_distinct('mse_daily', 'ticker')
 mse_companies = get_distinct('mse_daily', 'company_name')
 mse_sectors = get_distinct('mse_daily', 'sector')
 mse_dates = get_distinct('mse_daily', 'trade_date', limit=20)
 
-mse_templates = [
+mse_templates = prepare_templates([
     {"q_en": "Close price of {ticker}?", "q_ny": "Mtengo wotseka wa {ticker}?", "sql": "SELECT close_price FROM mse_daily WHERE ticker = '{ticker}' ORDER BY trade_date DESC LIMIT 1;", "diff": "easy"},
     {"q_en": "Volume for {ticker}?", "q_ny": "Kuchuluka kwa {ticker}?", "sql": "SELECT volume FROM mse_daily WHERE ticker = '{ticker}' ORDER BY trade_date DESC LIMIT 1;", "diff": "easy"},
     {"q_en": "PE ratio for {ticker}?", "q_ny": "PE ratio ya {ticker}?", "sql": "SELECT pe_ratio FROM mse_daily WHERE ticker = '{ticker}' ORDER BY trade_date DESC LIMIT 1;", "diff": "medium"},
@@ -271,32 +436,43 @@ mse_templates = [
     {"q_en": "PBV ratio of {ticker}?", "q_ny": "PBV ya {ticker}?", "sql": "SELECT pbv_ratio FROM mse_daily WHERE ticker = '{ticker}' ORDER BY trade_date DESC LIMIT 1;", "diff": "medium"},
     {"q_en": "Previous close of {ticker}?", "q_ny": "Mtengo wapitawo wa {ticker}?", "sql": "SELECT previous_close_price FROM mse_daily WHERE ticker = '{ticker}' ORDER BY trade_date DESC LIMIT 1;", "diff": "easy"},
     {"q_en": "How many sectors on MSE?", "q_ny": "Magawo angati pa MSE?", "sql": "SELECT COUNT(DISTINCT sector) FROM mse_daily WHERE sector IS NOT NULL;", "diff": "easy"},
-]
+])
+
+mse_pools = {'ticker': mse_tickers, 'company': mse_companies or [''], 'sector': mse_sectors or [''], 'date': mse_dates}
+
+# ============================================================================
+# FILL ALL TABLES
+# ============================================================================
+print("\n[7] Filling all tables...")
+valid_by_table.update(generate_all(
+    {
+        'production': (prod_templates, prod_pools),
+        'population': (pop_templates, pop_pools),
+        'food_insecurity': (fi_templates, fi_pools),
+        'commodity_prices': (cp_templates, cp_pools),
+        'mse_daily': (mse_templates, mse_pools),
+    },
+    TARGET_PER_TABLE, valid_by_table, existing_keys
+))
+for t, instances in valid_by_table.items():
+    print(f"  {t}: {len(instances)}")
 
-valid_by_table['mse_daily'] = generate_and_add(
-    'mse_daily', mse_templates,
-    lambda: {'ticker': random.choice(mse_tickers), 'company': random.choice(mse_companies) if mse_companies else '', 'sector': random.choice(mse_sectors) if mse_sectors else '', 'date': random.choice(mse_dates)},
-    TARGET_PER_TABLE, valid_by_table['mse_daily']
-)
-print(f"  mse_daily: {len(valid_by_table['mse_daily'])}")
+cursor.execute("COMMIT")
+save_distinct_cache()
 
 # ============================================================================
 # COMBINE AND SAVE
 # ============================================================================
-print("\n[7] Combining all tables...")
-final_data = []
+print("\n[8] Combining all tables...")
 table_order = ['production', 'population', 'food_insecurity', 'commodity_prices', 'mse_daily']
 
-for table in table_order:
-    final_data.extend(valid_by_table[table])
-
-print(f"\nFinal dataset: {len(final_data)} instances")
+print(f"\nFinal dataset: {sum(len(valid_by_table[t]) for t in table_order)} instances")
 print("\nDistribution:")
 for table in table_order:
     print(f"  {table}: {len(valid_by_table[table])}")
 
 with open(CORRECTED_PATH, 'w', encoding='utf-8') as f:
-    json.dump(final_data, f, indent=2, ensure_ascii=False)
+    write_json_array((inst for table in table_order for inst in valid_by_table[table]), f)
 
 conn.close()
 
@@ -5,14 +5,18 @@ Chichewa Text-to-SQL Dataset Correction Script
 Corrects SQL statements and regenerates instances to create a valid dataset.
 """
 
-import json
 import sqlite3
 import re
 import os
+import itertools
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
 from typing import Dict, List, Any, Tuple, Optional
-from collections import defaultdict
+from collections import Counter, namedtuple
 import random
 
+from dataset_io import compile_format, compile_param_sql, format_result, template_fields, write_json_array
+
 random.seed(42)  # For reproducibility
 
 BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
@@ -22,24 +26,96 @@ OUTPUT_PATH = os.path.join(BASE_DIR, "data", "train", "train_corrected.json")
 
 TARGET_PER_TABLE = 80
 
+# Question/SQL template; a tuple keeps per-instance field access cheap in the generator loops
+Template = namedtuple("Template", "en ny sql diff")
+
 # ============================================================================
 # DATABASE HELPER
 # ============================================================================
 
 class DatabaseHelper:
     def __init__(self, db_path: str):
-        self.conn = sqlite3.connect(db_path)
+        # The tables are small, so copy the whole database into memory once and answer every
+        # query from RAM; SQLite still executes them, so results match the on-disk database.
+        source = sqlite3.connect(Path(db_path).as_uri() + "?mode=ro", uri=True)
+        self.conn = sqlite3.connect(":memory:", isolation_level=None)
+        source.backup(self.conn)
+        source.close()
+        self.conn.execute("PRAGMA query_only=1")
         self.cursor = self.conn.cursor()
+        self.cursor.execute("BEGIN")
+        self._lookups: Dict[str, Optional[Tuple[Tuple[str, ...], Dict[tuple, list], list]]] = {}
+        self._result_cache: Dict[Tuple[str, tuple], list] = {}
+        self._integer_columns: Dict[Tuple[str, str], bool] = {}
         
-    def execute(self, sql: str) -> Tuple[bool, Any, Optional[str]]:
-        """Execute SQL and return (success, result, error)."""
+    def execute(self, sql: str, params: tuple = ()) -> Tuple[bool, Any, Optional[str]]:
+        """Execute SQL and return (success, result, error), reusing earlier results for the same query."""
+        key = (sql, params)
+        if key in self._result_cache:
+            return True, self._result_cache[key], None
         try:
-            self.cursor.execute(sql)
-            results = self.cursor.fetchall()
+            self.cursor.execute(sql, params)
+            results = self._result_cache[key] = self.cursor.fetchall()
             return True, results, None
         except sqlite3.Error as e:
             return False, None, str(e)
     
+    def lookup(self, sql_template: str) -> Optional[Tuple[Tuple[str, ...], Dict[tuple, list], list]]:
+        """Answer every binding of an aggregate template from one GROUP BY query.
+
+        Returns (placeholder names, rows keyed by placeholder values, rows for an unmatched
+        binding), or None when the template must be executed per binding.
+        """
+        if sql_template not in self._lookups:
+            self._lookups[sql_template] = self._build_lookup(self.executable_sql(sql_template))
+        return self._lookups[sql_template]
+
+    def _build_lookup(self, sql_template: str) -> Optional[Tuple[Tuple[str, ...], Dict[tuple, list], list]]:
+        aggregate = compile_aggregate(sql_template)
+        if aggregate is None:
+            return None
+        batch_sql, names, empty_sql = aggregate
+        n_keys = len(names)
+        rows_by_key = {row[:n_keys]: [row[n_keys:]] for row in self.conn.execute(batch_sql)}
+        return names, rows_by_key, self.conn.execute(empty_sql).fetchall()
+
+    def executable_sql(self, sql_template: str) -> str:
+        """Drop `CAST(col AS INTEGER)` wrappers on columns that already store only integers.
+
+        The cast is the identity on those values, so the query returns the same rows
+        without coercing every row on every execution. The stored SQL keeps the cast.
+        """
+        tables = set(_FROM_RX.findall(sql_template))
+        if len(tables) != 1:
+            return sql_template
+        table = tables.pop()
+        return _INTEGER_CAST_RX.sub(
+            lambda m: m.group(1) if self._is_integer_column(table, m.group(1)) else m.group(0),
+            sql_template,
+        )
+
+    def _is_integer_column(self, table: str, column: str) -> bool:
+        key = (table, column)
+        if key not in self._integer_columns:
+            self.cursor.execute(
+                f"SELECT NOT EXISTS (SELECT 1 FROM {table} WHERE typeof({column}) NOT IN ('integer', 'null'))"
+            )
+            self._integer_columns[key] = bool(self.cursor.fetchone()[0])
+        return self._integer_columns[key]
+
+    def execute_template(self, sql_template: str, params: Dict[str, Any]) -> Tuple[bool, Any, Optional[str]]:
+        """Execute one binding of a SQL template as a parameterized statement."""
+        sql_param, fields = compile_param_sql(sql_template)
+        return self.execute(sql_param, tuple(str(params[name]) if quoted else params[name] for name, quoted in fields))
+
+    def run_template(self, sql_template: str, params: Dict[str, Any]) -> Tuple[bool, Any, Optional[str]]:
+        """Return (success, result, error) for one binding of a SQL template."""
+        lookup = self.lookup(sql_template)
+        if lookup is None:
+            return self.execute_template(self.executable_sql(sql_template), params)
+        names, rows_by_key, unmatched = lookup
+        return True, rows_by_key.get(tuple(params[name] for name in names), unmatched), None
+    
     def get_distinct_values(self, table: str, column: str, limit: int = 50) -> List[Any]:
         """Get distinct values from a column."""
         try:
@@ -49,31 +125,99 @@ class DatabaseHelper:
             return []
     
     def close(self):
+        self.conn.execute("COMMIT")
         self.conn.close()
 
 
-def format_result(result: Any) -> str:
-    """Format SQL result for storage in JSON as proper SQL-style tuples."""
-    if result is None:
-        return "[]"
-    
-    if not result:
-        return "[]"
-    
-    # Format all results as list of tuples (SQL result format)
-    formatted = []
-    for row in result:
-        formatted_row = []
-        for val in row:
-            if isinstance(val, float):
-                formatted_row.append(round(val, 2))
-            else:
-                formatted_row.append(val)
-        # Convert to tuple representation
-        formatted.append(tuple(formatted_row))
-    
-    # Return as string representation of list of tuples
-    return str(formatted)
+def render_sql(sql_template: str, params: Dict[str, Any]) -> str:
+    """Render a SQL template, doubling single quotes so text values stay valid literals.
+
+    Only the placeholders the template uses are escaped and passed to the renderer.
+    """
+    escaped = {}
+    for name in template_fields(sql_template):
+        value = params[name]
+        escaped[name] = value.replace("'", "''") if isinstance(value, str) else value
+    return compile_format(sql_template)(**escaped)
+
+
+_FROM_RX = re.compile(r"\bFROM (\w+)")
+_INTEGER_CAST_RX = re.compile(r"CAST\((\w+) AS INTEGER\)")
+def iter_combinations(templates: List[Template], pools: Dict[str, List[Any]]):
+    """Yield (template, params) for every distinct binding of every template.
+
+    Only the placeholders a template actually uses are enumerated, so each rendered
+    instance is visited at most once and iteration ends when the bindings run out.
+    Bindings are shuffled per template and templates are taken round-robin, which keeps
+    the same template mix as cycling through the list.
+    """
+    per_template = []
+    for template in templates:
+        fields = template_fields(template.en + template.ny + template.sql)
+        combos = [dict(zip(fields, values)) for values in itertools.product(*(pools[f] for f in fields))]
+        random.shuffle(combos)
+        per_template.append(combos)
+    for round_combos in itertools.zip_longest(*per_template):
+        for template, params in zip(templates, round_combos):
+            if params is not None:
+                yield template, params
+
+
+# ============================================================================
+# BATCHED AGGREGATE LOOKUPS
+# ============================================================================
+
+# Whole-match aggregates: SELECT <aggregates> FROM table WHERE <conditions>;
+_AGGREGATE_RX = re.compile(r"^SELECT (.+?) FROM (\w+) WHERE (.+?);$")
+_AGGREGATE_FN_RX = re.compile(r"\b(?:SUM|AVG|MIN|MAX|COUNT|TOTAL)\(")
+_CLAUSE_RX = re.compile(r"\b(?:GROUP BY|ORDER BY|LIMIT|HAVING)\b")
+_EQ_PARAM_RX = re.compile(r"^(\w+) = '?\{(\w+)\}'?$")
+
+
+def split_conditions(where: str) -> Optional[Tuple[List[str], List[str], List[str]]]:
+    """Split a WHERE clause into (key columns, placeholder names, fixed filters).
+
+    Each `col = '{name}'` condition becomes a key column, and conditions without
+    placeholders are kept as filters. `=` never matches NULL, so NULL keys are filtered
+    out like they are for a single binding. Returns None if the clause does not fit.
+    """
+    key_columns, names, filters = [], [], []
+    for condition in where.split(" AND "):
+        eq = _EQ_PARAM_RX.match(condition)
+        if eq:
+            key_columns.append(eq.group(1))
+            names.append(eq.group(2))
+        elif "{" in condition:
+            return None
+        else:
+            filters.append(condition)
+    if not names:
+        return None
+    filters.extend(f"{column} IS NOT NULL" for column in key_columns)
+    return key_columns, names, filters
+
+
+def compile_aggregate(sql_template: str) -> Optional[Tuple[str, Tuple[str, ...], str]]:
+    """Rewrite an aggregate template into one GROUP BY query over all bindings.
+
+    A binding that matches no rows still gets the single row an empty aggregate returns
+    (NULL for SUM/AVG/MIN/MAX, 0 for COUNT), which `empty_sql` computes once. Returns
+    (batch_sql, placeholder names, empty_sql), or None if the template does not fit.
+    """
+    match = _AGGREGATE_RX.match(sql_template)
+    if match is None or _CLAUSE_RX.search(sql_template):
+        return None
+    columns, table, where = match.groups()
+    if not _AGGREGATE_FN_RX.search(columns) or "SELECT" in where:
+        return None
+    split = split_conditions(where)
+    if split is None:
+        return None
+    key_columns, names, filters = split
+    keys = ", ".join(key_columns)
+    batch_sql = f"SELECT {keys}, {columns} FROM {table} WHERE {' AND '.join(filters)} GROUP BY {keys}"
+    empty_sql = f"SELECT {columns} FROM {table} WHERE 0"
+    return batch_sql, tuple(names), empty_sql
 
 
 # ============================================================================
@@ -99,21 +243,27 @@ FOOD_INSECURITY_FIXES = {
 }
 
 
+# Compiled once; population columns are rewritten in a single alternation pass
+_POPULATION_COLUMN_RX = re.compile(r"(?<![a-z_])(district|population)(?![_a-z])", re.IGNORECASE)
+_POPULATION_COLUMN_MAP = {'district': 'district_name', 'population': 'total_population'}
+_FOOD_INSECURITY_COLUMN_RX = re.compile(r"(?<![a-z_])population(?![_a-z])", re.IGNORECASE)
+_TABLE_NAME_RX = re.compile(r'\baverage_prices\b', re.IGNORECASE)
+
+
 def fix_sql_columns(sql: str, table: str) -> str:
     """Fix column references in SQL based on table."""
     fixed_sql = sql
     
     if table == 'population':
         # Fix common population column issues
-        fixed_sql = re.sub(r"(?<![a-z_])district(?![_a-z])", "district_name", fixed_sql, flags=re.IGNORECASE)
-        fixed_sql = re.sub(r"(?<![a-z_])population(?![_a-z])", "total_population", fixed_sql, flags=re.IGNORECASE)
+        fixed_sql = _POPULATION_COLUMN_RX.sub(lambda m: _POPULATION_COLUMN_MAP[m.group(1).lower()], fixed_sql)
         
     elif table == 'food_insecurity':
         # Fix common food_insecurity column issues  
-        fixed_sql = re.sub(r"(?<![a-z_])population(?![_a-z])", "analyzed_population", fixed_sql, flags=re.IGNORECASE)
+        fixed_sql = _FOOD_INSECURITY_COLUMN_RX.sub("analyzed_population", fixed_sql)
     
     # Fix table name issues
-    fixed_sql = re.sub(r'\baverage_prices\b', 'commodity_prices', fixed_sql, flags=re.IGNORECASE)
+    fixed_sql = _TABLE_NAME_RX.sub('commodity_prices', fixed_sql)
     
     return fixed_sql
 
@@ -132,129 +282,118 @@ def generate_production_instances(db: DatabaseHelper) -> List[Dict]:
     
     templates = [
         # Easy queries
-        {
-            "template_en": "How much {crop} was produced in {district}?",
-            "template_ny": "Ndi {crop} ochuluka bwanji adakololedwa ku {district}?",
-            "sql_template": "SELECT yield FROM production WHERE district = '{district}' AND crop = '{crop}';",
-            "difficulty": "easy"
-        },
-        {
-            "template_en": "What was the total {crop} yield in {season}?",
-            "template_ny": "Ndi {crop} ochuluka bwanji adakololedwa mu {season}?",
-            "sql_template": "SELECT SUM(yield) FROM production WHERE crop = '{crop}' AND season = '{season}';",
-            "difficulty": "easy"
-        },
-        {
-            "template_en": "Which crops were grown in {district}?",
-            "template_ny": "Ndi mbewu zanji zomwe zidabzalidwa ku {district}?",
-            "sql_template": "SELECT DISTINCT crop FROM production WHERE district = '{district}';",
-            "difficulty": "easy"
-        },
-        {
-            "template_en": "What is the yield of {crop} in {district} during {season}?",
-            "template_ny": "Ndi zokolola za {crop} zochuluka bwanji ku {district} mu {season}?",
-            "sql_template": "SELECT yield FROM production WHERE district = '{district}' AND crop = '{crop}' AND season = '{season}';",
-            "difficulty": "easy"
-        },
+        Template(
+            en="How much {crop} was produced in {district}?",
+            ny="Ndi {crop} ochuluka bwanji adakololedwa ku {district}?",
+            sql="SELECT yield FROM production WHERE district = '{district}' AND crop = '{crop}';",
+            diff="easy"
+        ),
+        Template(
+            en="What was the total {crop} yield in {season}?",
+            ny="Ndi {crop} ochuluka bwanji adakololedwa mu {season}?",
+            sql="SELECT SUM(yield) FROM production WHERE crop = '{crop}' AND season = '{season}';",
+            diff="easy"
+        ),
+        Template(
+            en="Which crops were grown in {district}?",
+            ny="Ndi mbewu zanji zomwe zidabzalidwa ku {district}?",
+            sql="SELECT DISTINCT crop FROM production WHERE district = '{district}';",
+            diff="easy"
+        ),
+        Template(
+            en="What is the yield of {crop} in {district} during {season}?",
+            ny="Ndi zokolola za {crop} zochuluka bwanji ku {district} mu {season}?",
+            sql="SELECT yield FROM production WHERE district = '{district}' AND crop = '{crop}' AND season = '{season}';",
+            diff="easy"
+        ),
         # Medium queries
-        {
-            "template_en": "Which district produced the most {crop}?",
-            "template_ny": "Ndi boma liti lomwe lidakolola {crop} kwambiri?",
-            "sql_template": "SELECT district FROM production WHERE crop = '{crop}' ORDER BY yield DESC LIMIT 1;",
-            "difficulty": "medium"
-        },
-        {
-            "template_en": "What is the average {crop} yield across all districts?",
-            "template_ny": "Ndi zokolola za {crop} zomwe zimapezeka pakatikati m'maboma onse?",
-            "sql_template": "SELECT AVG(yield) FROM production WHERE crop = '{crop}';",
-            "difficulty": "medium"
-        },
-        {
-            "template_en": "Which crops performed well in {district}?",
-            "template_ny": "Ndi mbewu zanji zomwe zidachita bwino ku {district}?",
-            "sql_template": "SELECT crop, yield FROM production WHERE district = '{district}' ORDER BY yield DESC LIMIT 5;",
-            "difficulty": "medium"
-        },
-        {
-            "template_en": "How many different crops are grown in {district}?",
-            "template_ny": "Ndi mitundu ingati ya mbewu yomwe imabzalidwa ku {district}?",
-            "sql_template": "SELECT COUNT(DISTINCT crop) FROM production WHERE district = '{district}';",
-            "difficulty": "medium"
-        },
+        Template(
+            en="Which district produced the most {crop}?",
+            ny="Ndi boma liti lomwe lidakolola {crop} kwambiri?",
+            sql="SELECT district FROM production WHERE crop = '{crop}' ORDER BY yield DESC LIMIT 1;",
+            diff="medium"
+        ),
+        Template(
+            en="What is the average {crop} yield across all districts?",
+            ny="Ndi zokolola za {crop} zomwe zimapezeka pakatikati m'maboma onse?",
+            sql="SELECT AVG(yield) FROM production WHERE crop = '{crop}';",
+            diff="medium"
+        ),
+        Template(
+            en="Which crops performed well in {district}?",
+            ny="Ndi mbewu zanji zomwe zidachita bwino ku {district}?",
+            sql="SELECT crop, yield FROM production WHERE district = '{district}' ORDER BY yield DESC LIMIT 5;",
+            diff="medium"
+        ),
+        Template(
+            en="How many different crops are grown in {district}?",
+            ny="Ndi mitundu ingati ya mbewu yomwe imabzalidwa ku {district}?",
+            sql="SELECT COUNT(DISTINCT crop) FROM production WHERE district = '{district}';",
+            diff="medium"
+        ),
         # Hard queries
-        {
-            "template_en": "Which districts have {crop} yield above average?",
-            "template_ny": "Ndi maboma ati omwe ali ndi zokolola za {crop} kupitilira pakatikati?",
-            "sql_template": "SELECT district, yield FROM production WHERE crop = '{crop}' AND yield > (SELECT AVG(yield) FROM production WHERE crop = '{crop}');",
-            "difficulty": "hard"
-        },
-        {
-            "template_en": "What is the total production of all crops in {district}?",
-            "template_ny": "Ndi zokolola zonse zochuluka bwanji ku {district}?",
-            "sql_template": "SELECT SUM(yield) FROM production WHERE district = '{district}';",
-            "difficulty": "medium"
-        },
-        {
-            "template_en": "Compare {crop} production between {district} and other districts",
-            "template_ny": "Yerekezani zokolola za {crop} pakati pa {district} ndi maboma ena",
-            "sql_template": "SELECT district, yield FROM production WHERE crop = '{crop}' ORDER BY yield DESC LIMIT 5;",
-            "difficulty": "hard"
-        },
-        {
-            "template_en": "What was the minimum {crop} yield recorded?",
-            "template_ny": "Ndi zokolola za {crop} zochepa kwambiri zomwe zidalembedwa?",
-            "sql_template": "SELECT MIN(yield) FROM production WHERE crop = '{crop}';",
-            "difficulty": "easy"
-        },
-        {
-            "template_en": "What was the maximum {crop} yield recorded?",
-            "template_ny": "Ndi zokolola za {crop} zambiri kwambiri zomwe zidalembedwa?",
-            "sql_template": "SELECT MAX(yield) FROM production WHERE crop = '{crop}';",
-            "difficulty": "easy"
-        },
-        {
-            "template_en": "List all districts that grow {crop}",
-            "template_ny": "Lembani maboma onse omwe amabzala {crop}",
-            "sql_template": "SELECT DISTINCT district FROM production WHERE crop = '{crop}';",
-            "difficulty": "easy"
-        },
-        {
-            "template_en": "Top 3 crops by yield in {district}",
-            "template_ny": "Mbewu zitatu zapamwamba mwa zokolola ku {district}",
-            "sql_template": "SELECT crop, yield FROM production WHERE district = '{district}' ORDER BY yield DESC LIMIT 3;",
-            "difficulty": "medium"
-        },
+        Template(
+            en="Which districts have {crop} yield above average?",
+            ny="Ndi maboma ati omwe ali ndi zokolola za {crop} kupitilira pakatikati?",
+            sql="SELECT district, yield FROM production WHERE crop = '{crop}' AND yield > (SELECT AVG(yield) FROM production WHERE crop = '{crop}');",
+            diff="hard"
+        ),
+        Template(
+            en="What is the total production of all crops in {district}?",
+            ny="Ndi zokolola zonse zochuluka bwanji ku {district}?",
+            sql="SELECT SUM(yield) FROM production WHERE district = '{district}';",
+            diff="medium"
+        ),
+        Template(
+            en="Compare {crop} production between {district} and other districts",
+            ny="Yerekezani zokolola za {crop} pakati pa {district} ndi maboma ena",
+            sql="SELECT district, yield FROM production WHERE crop = '{crop}' ORDER BY yield DESC LIMIT 5;",
+            diff="hard"
+        ),
+        Template(
+            en="What was the minimum {crop} yield recorded?",
+            ny="Ndi zokolola za {crop} zochepa kwambiri zomwe zidalembedwa?",
+            sql="SELECT MIN(yield) FROM production WHERE crop = '{crop}';",
+            diff="easy"
+        ),
+        Template(
+            en="What was the maximum {crop} yield recorded?",
+            ny="Ndi zokolola za {crop} zambiri kwambiri zomwe zidalembedwa?",
+            sql="SELECT MAX(yield) FROM production WHERE crop = '{crop}';",
+            diff="easy"
+        ),
+        Template(
+            en="List all districts that grow {crop}",
+            ny="Lembani maboma onse omwe amabzala {crop}",
+            sql="SELECT DISTINCT district FROM production WHERE crop = '{crop}';",
+            diff="easy"
+        ),
+        Template(
+            en="Top 3 crops by yield in {district}",
+            ny="Mbewu zitatu zapamwamba mwa zokolola ku {district}",
+            sql="SELECT crop, yield FROM production WHERE district = '{district}' ORDER BY yield DESC LIMIT 3;",
+            diff="medium"
+        ),
     ]
     
     count = 0
-    template_idx = 0
+    pools = {"district": districts, "crop": crops, "season": seasons or ['2023-2024']}
     
-    while count < TARGET_PER_TABLE:
-        template = templates[template_idx % len(templates)]
-        district = random.choice(districts)
-        crop = random.choice(crops)
-        season = random.choice(seasons) if seasons else '2023-2024'
-        
-        question_en = template["template_en"].format(crop=crop, district=district, season=season)
-        question_ny = template["template_ny"].format(crop=crop, district=district, season=season)
-        sql = template["sql_template"].format(crop=crop, district=district, season=season)
-        
-        # Execute and check result
-        success, result, error = db.execute(sql)
+    for template, params in iter_combinations(templates, pools):
+        if count >= TARGET_PER_TABLE:
+            break
+        # Execute and check result; questions and SQL text are rendered only on success
+        success, result, error = db.run_template(template.sql, params)
         if success and result:
             instances.append({
-                "question_en": question_en,
-                "question_ny": question_ny,
-                "sql_statement": sql,
+                "question_en": compile_format(template.en)(**params),
+                "question_ny": compile_format(template.ny)(**params),
+                "sql_statement": render_sql(template.sql, params),
                 "sql_result": format_result(result),
-                "difficulty_level": template["difficulty"],
+                "difficulty_level": template.diff,
                 "table": "production"
             })
             count += 1
-        
-        template_idx += 1
-        if template_idx > len(templates) * len(districts):
-            break
     
     return instances[:TARGET_PER_TABLE]
 
@@ -268,131 +407,119 @@ def generate_population_instances(db: DatabaseHelper) -> List[Dict]:
     tas = db.get_distinct_values('population', 'ta_name', limit=30)
     
     templates = [
-        {
-            "template_en": "What is the total population in {district}?",
-            "template_ny": "Ndi anthu angati onse okhala ku {district}?",
-            "sql_template": "SELECT SUM(CAST(total_population AS INTEGER)) FROM population WHERE district_name = '{district}';",
-            "difficulty": "easy"
-        },
-        {
-            "template_en": "How many males live in {district}?",
-            "template_ny": "Ndi amuna angati okhala ku {district}?",
-            "sql_template": "SELECT SUM(population_male) FROM population WHERE district_name = '{district}';",
-            "difficulty": "easy"
-        },
-        {
-            "template_en": "How many females live in {district}?",
-            "template_ny": "Ndi akazi angati okhala ku {district}?",
-            "sql_template": "SELECT SUM(population_female) FROM population WHERE district_name = '{district}';",
-            "difficulty": "easy"
-        },
-        {
-            "template_en": "How many households are in {district}?",
-            "template_ny": "Ndi mabanja angati ku {district}?",
-            "sql_template": "SELECT SUM(number_households) FROM population WHERE district_name = '{district}';",
-            "difficulty": "easy"
-        },
-        {
-            "template_en": "What is the population of {ta_name} traditional authority?",
-            "template_ny": "Ndi anthu angati ku TA {ta_name}?",
-            "sql_template": "SELECT SUM(CAST(total_population AS INTEGER)) FROM population WHERE ta_name = '{ta_name}';",
-            "difficulty": "medium"
-        },
-        {
-            "template_en": "Which districts are in the {region} region?",
-            "template_ny": "Ndi maboma ati omwe ali m'chigawo cha {region}?",
-            "sql_template": "SELECT DISTINCT district_name FROM population WHERE region_name = '{region}';",
-            "difficulty": "easy"
-        },
-        {
-            "template_en": "What is the total population in {region} region?",
-            "template_ny": "Ndi anthu angati onse m'chigawo cha {region}?",
-            "sql_template": "SELECT SUM(CAST(total_population AS INTEGER)) FROM population WHERE region_name = '{region}';",
-            "difficulty": "medium"
-        },
-        {
-            "template_en": "How many traditional authorities are in {district}?",
-            "template_ny": "Ndi mafumu aakulu angati ku {district}?",
-            "sql_template": "SELECT COUNT(DISTINCT ta_name) FROM population WHERE district_name = '{district}';",
-            "difficulty": "medium"
-        },
-        {
-            "template_en": "What is the male to female ratio in {district}?",
-            "template_ny": "Ndi kuchuluka kwa amuna ndi akazi ku {district}?",
-            "sql_template": "SELECT SUM(population_male), SUM(population_female) FROM population WHERE district_name = '{district}';",
-            "difficulty": "medium"
-        },
-        {
-            "template_en": "Which district has the most households?",
-            "template_ny": "Ndi boma liti lomwe lili ndi mabanja ambiri?",
-            "sql_template": "SELECT district_name, SUM(number_households) as total FROM population GROUP BY district_name ORDER BY total DESC LIMIT 1;",
-            "difficulty": "hard"
-        },
-        {
-            "template_en": "What is the average household size in {district}?",
-            "template_ny": "Ndi kukula kwa banja pakatikati ku {district}?",
-            "sql_template": "SELECT ROUND(SUM(CAST(total_population AS REAL)) / SUM(number_households), 2) FROM population WHERE district_name = '{district}';",
-            "difficulty": "hard"
-        },
-        {
-            "template_en": "List all traditional authorities in {district}",
-            "template_ny": "Lembani mafumu onse ku {district}",
-            "sql_template": "SELECT DISTINCT ta_name FROM population WHERE district_name = '{district}';",
-            "difficulty": "easy"
-        },
-        {
-            "template_en": "Which region has the largest population?",
-            "template_ny": "Ndi chigawo chiti chomwe chili ndi anthu ambiri?",
-            "sql_template": "SELECT region_name, SUM(CAST(total_population AS INTEGER)) as total FROM population GROUP BY region_name ORDER BY total DESC LIMIT 1;",
-            "difficulty": "hard"
-        },
-        {
-            "template_en": "How many enumeration areas are in {district}?",
-            "template_ny": "Ndi malo angati owerengera anthu ku {district}?",
-            "sql_template": "SELECT COUNT(DISTINCT ea_code) FROM population WHERE district_name = '{district}';",
-            "difficulty": "medium"
-        },
-        {
-            "template_en": "What is the total number of districts in {region} region?",
-            "template_ny": "Ndi maboma angati m'chigawo cha {region}?",
-            "sql_template": "SELECT COUNT(DISTINCT district_name) FROM population WHERE region_name = '{region}';",
-            "difficulty": "easy"
-        },
+        Template(
+            en="What is the total population in {district}?",
+            ny="Ndi anthu angati onse okhala ku {district}?",
+            sql="SELECT SUM(CAST(total_population AS INTEGER)) FROM population WHERE district_name = '{district}';",
+            diff="easy"
+        ),
+        Template(
+            en="How many males live in {district}?",
+            ny="Ndi amuna angati okhala ku {district}?",
+            sql="SELECT SUM(population_male) FROM population WHERE district_name = '{district}';",
+            diff="easy"
+        ),
+        Template(
+            en="How many females live in {district}?",
+            ny="Ndi akazi angati okhala ku {district}?",
+            sql="SELECT SUM(population_female) FROM population WHERE district_name = '{district}';",
+            diff="easy"
+        ),
+        Template(
+            en="How many households are in {district}?",
+            ny="Ndi mabanja angati ku {district}?",
+            sql="SELECT SUM(number_households) FROM population WHERE district_name = '{district}';",
+            diff="easy"
+        ),
+        Template(
+            en="What is the population of {ta_name} traditional authority?",
+            ny="Ndi anthu angati ku TA {ta_name}?",
+            sql="SELECT SUM(CAST(total_population AS INTEGER)) FROM population WHERE ta_name = '{ta_name}';",
+            diff="medium"
+        ),
+        Template(
+            en="Which districts are in the {region} region?",
+            ny="Ndi maboma ati omwe ali m'chigawo cha {region}?",
+            sql="SELECT DISTINCT district_name FROM population WHERE region_name = '{region}';",
+            diff="easy"
+        ),
+        Template(
+            en="What is the total population in {region} region?",
+            ny="Ndi anthu angati onse m'chigawo cha {region}?",
+            sql="SELECT SUM(CAST(total_population AS INTEGER)) FROM population WHERE region_name = '{region}';",
+            diff="medium"
+        ),
+        Template(
+            en="How many traditional authorities are in {district}?",
+            ny="Ndi mafumu aakulu angati ku {district}?",
+            sql="SELECT COUNT(DISTINCT ta_name) FROM population WHERE district_name = '{district}';",
+            diff="medium"
+        ),
+        Template(
+            en="What is the male to female ratio in {district}?",
+            ny="Ndi kuchuluka kwa amuna ndi akazi ku {district}?",
+            sql="SELECT SUM(population_male), SUM(population_female) FROM population WHERE district_name = '{district}';",
+            diff="medium"
+        ),
+        Template(
+            en="Which district has the most households?",
+            ny="Ndi boma liti lomwe lili ndi mabanja ambiri?",
+            sql="SELECT district_name, SUM(number_households) as total FROM population GROUP BY district_name ORDER BY total DESC LIMIT 1;",
+            diff="hard"
+        ),
+        Template(
+            en="What is the average household size in {district}?",
+            ny="Ndi kukula kwa banja pakatikati ku {district}?",
+            sql="SELECT ROUND(SUM(CAST(total_population AS REAL)) / SUM(number_households), 2) FROM population WHERE district_name = '{district}';",
+            diff="hard"
+        ),
+        Template(
+            en="List all traditional authorities in {district}",
+            ny="Lembani mafumu onse ku {district}",
+            sql="SELECT DISTINCT ta_name FROM population WHERE district_name = '{district}';",
+            diff="easy"
+        ),
+        Template(
+            en="Which region has the largest population?",
+            ny="Ndi chigawo chiti chomwe chili ndi anthu ambiri?",
+            sql="SELECT region_name, SUM(CAST(total_population AS INTEGER)) as total FROM population GROUP BY region_name ORDER BY total DESC LIMIT 1;",
+            diff="hard"
+        ),
+        Template(
+            en="How many enumeration areas are in {district}?",
+            ny="Ndi malo angati owerengera anthu ku {district}?",
+            sql="SELECT COUNT(DISTINCT ea_code) FROM population WHERE district_name = '{district}';",
+            diff="medium"
+        ),
+        Template(
+            en="What is the total number of districts in {region} region?",
+            ny="Ndi maboma angati m'chigawo cha {region}?",
+            sql="SELECT COUNT(DISTINCT district_name) FROM population WHERE region_name = '{region}';",
+            diff="easy"
+        ),
     ]
     
     count = 0
-    template_idx = 0
-    used_combinations = set()
-    
-    while count < TARGET_PER_TABLE and template_idx < len(templates) * 100:
-        template = templates[template_idx % len(templates)]
-        district = random.choice(districts) if districts else 'Lilongwe'
-        region = random.choice(regions) if regions else 'Central'
-        ta_name = random.choice(tas) if tas else 'Kabudula'
-        
-        combo_key = f"{template_idx % len(templates)}_{district}_{region}_{ta_name}"
-        if combo_key in used_combinations:
-            template_idx += 1
-            continue
-        used_combinations.add(combo_key)
-        
-        question_en = template["template_en"].format(district=district, region=region, ta_name=ta_name)
-        question_ny = template["template_ny"].format(district=district, region=region, ta_name=ta_name)
-        sql = template["sql_template"].format(district=district, region=region, ta_name=ta_name)
-        
-        success, result, error = db.execute(sql)
+    pools = {
+        "district": districts or ['Lilongwe'],
+        "region": regions or ['Central'],
+        "ta_name": tas or ['Kabudula'],
+    }
+    
+    for template, params in iter_combinations(templates, pools):
+        if count >= TARGET_PER_TABLE:
+            break
+        success, result, error = db.run_template(template.sql, params)
         if success and result and result[0][0] is not None:
             instances.append({
-                "question_en": question_en,
-                "question_ny": question_ny,
-                "sql_statement": sql,
+                "question_en": compile_format(template.en)(**params),
+                "question_ny": compile_format(template.ny)(**params),
+                "sql_statement": render_sql(template.sql, params),
                 "sql_result": format_result(result),
-                "difficulty_level": template["difficulty"],
+                "difficulty_level": template.diff,
                 "table": "population"
             })
             count += 1
-        
-        template_idx += 1
     
     return instances[:TARGET_PER_TABLE]
 
@@ -406,130 +533,115 @@ def generate_food_insecurity_instances(db: DatabaseHelper) -> List[Dict]:
     levels = db.get_distinct_values('food_insecurity', 'insecurity_level')
     
     templates = [
-        {
-            "template_en": "What is the food insecurity level in {district}?",
-            "template_ny": "Ndi mlingo wanji wa kusowa chakudya ku {district}?",
-            "sql_template": "SELECT insecurity_level, insecurity_desc_short FROM food_insecurity WHERE district = '{district}';",
-            "difficulty": "easy"
-        },
-        {
-            "template_en": "How many people are analyzed for food insecurity in {district}?",
-            "template_ny": "Ndi anthu angati omwe akuwunikiridwa za kusowa chakudya ku {district}?",
-            "sql_template": "SELECT analyzed_population FROM food_insecurity WHERE district = '{district}';",
-            "difficulty": "easy"
-        },
-        {
-            "template_en": "What percentage of population faces food insecurity in {district}?",
-            "template_ny": "Ndi peresenti yanji ya anthu omwe akukumana ndi vuto la kusowa chakudya ku {district}?",
-            "sql_template": "SELECT percentage_population FROM food_insecurity WHERE district = '{district}';",
-            "difficulty": "easy"
-        },
-        {
-            "template_en": "Which districts have food insecurity level {level}?",
-            "template_ny": "Ndi maboma ati omwe ali ndi mlingo wa kusowa chakudya {level}?",
-            "sql_template": "SELECT district FROM food_insecurity WHERE insecurity_level = {level};",
-            "difficulty": "medium"
-        },
-        {
-            "template_en": "What is the time period for food insecurity analysis in {district}?",
-            "template_ny": "Ndi nthawi yanji yomwe anawunikiridwa za kusowa chakudya ku {district}?",
-            "sql_template": "SELECT time_period FROM food_insecurity WHERE district = '{district}';",
-            "difficulty": "easy"
-        },
-        {
-            "template_en": "Describe the food insecurity situation in {district}",
-            "template_ny": "Fotokozani za vuto la kusowa chakudya ku {district}",
-            "sql_template": "SELECT insecurity_desc_long FROM food_insecurity WHERE district = '{district}';",
-            "difficulty": "easy"
-        },
-        {
-            "template_en": "Which district has the highest food insecurity level?",
-            "template_ny": "Ndi boma liti lomwe lili ndi vuto lalikulu la kusowa chakudya?",
-            "sql_template": "SELECT district, insecurity_level FROM food_insecurity ORDER BY insecurity_level DESC LIMIT 1;",
-            "difficulty": "medium"
-        },
-        {
-            "template_en": "Which district has the lowest food insecurity?",
-            "template_ny": "Ndi boma liti lomwe lili ndi vuto lochepa la kusowa chakudya?",
-            "sql_template": "SELECT district, insecurity_level FROM food_insecurity ORDER BY insecurity_level ASC LIMIT 1;",
-            "difficulty": "medium"
-        },
-        {
-            "template_en": "How many districts have critical food insecurity?",
-            "template_ny": "Ndi maboma angati omwe ali ndi vuto loopsa la kusowa chakudya?",
-            "sql_template": "SELECT COUNT(*) FROM food_insecurity WHERE insecurity_level >= 3;",
-            "difficulty": "medium"
-        },
-        {
-            "template_en": "What is the average food insecurity percentage across all districts?",
-            "template_ny": "Ndi peresenti yapakatikati ya kusowa chakudya m'maboma onse?",
-            "sql_template": "SELECT AVG(percentage_population) FROM food_insecurity;",
-            "difficulty": "medium"
-        },
-        {
-            "template_en": "List all districts with their food insecurity levels",
-            "template_ny": "Lembani maboma onse ndi milingo yawo ya kusowa chakudya",
-            "sql_template": "SELECT district, insecurity_level FROM food_insecurity ORDER BY insecurity_level DESC;",
-            "difficulty": "easy"
-        },
-        {
-            "template_en": "What is the total analyzed population for food insecurity?",
-            "template_ny": "Ndi anthu angati onse omwe anawunikiridwa za kusowa chakudya?",
-            "sql_template": "SELECT SUM(analyzed_population) FROM food_insecurity;",
-            "difficulty": "easy"
-        },
-        {
-            "template_en": "Which districts have food insecurity percentage above 20?",
-            "template_ny": "Ndi maboma ati omwe ali ndi peresenti ya kusowa chakudya kupitilira 20?",
-            "sql_template": "SELECT district, percentage_population FROM food_insecurity WHERE percentage_population > 20;",
-            "difficulty": "hard"
-        },
-        {
-            "template_en": "Compare food insecurity between {district} and other districts",
-            "template_ny": "Yerekezani kusowa chakudya pakati pa {district} ndi maboma ena",
-            "sql_template": "SELECT district, insecurity_level, percentage_population FROM food_insecurity ORDER BY insecurity_level DESC LIMIT 5;",
-            "difficulty": "hard"
-        },
-        {
-            "template_en": "What is the maximum analyzed population in any district?",
-            "template_ny": "Ndi anthu ochuluka kwambiri omwe anawunikiridwa ku boma lililonse?",
-            "sql_template": "SELECT MAX(analyzed_population) FROM food_insecurity;",
-            "difficulty": "easy"
-        },
+        Template(
+            en="What is the food insecurity level in {district}?",
+            ny="Ndi mlingo wanji wa kusowa chakudya ku {district}?",
+            sql="SELECT insecurity_level, insecurity_desc_short FROM food_insecurity WHERE district = '{district}';",
+            diff="easy"
+        ),
+        Template(
+            en="How many people are analyzed for food insecurity in {district}?",
+            ny="Ndi anthu angati omwe akuwunikiridwa za kusowa chakudya ku {district}?",
+            sql="SELECT analyzed_population FROM food_insecurity WHERE district = '{district}';",
+            diff="easy"
+        ),
+        Template(
+            en="What percentage of population faces food insecurity in {district}?",
+            ny="Ndi peresenti yanji ya anthu omwe akukumana ndi vuto la kusowa chakudya ku {district}?",
+            sql="SELECT percentage_population FROM food_insecurity WHERE district = '{district}';",
+            diff="easy"
+        ),
+        Template(
+            en="Which districts have food insecurity level {level}?",
+            ny="Ndi maboma ati omwe ali ndi mlingo wa kusowa chakudya {level}?",
+            sql="SELECT district FROM food_insecurity WHERE insecurity_level = {level};",
+            diff="medium"
+        ),
+        Template(
+            en="What is the time period for food insecurity analysis in {district}?",
+            ny="Ndi nthawi yanji yomwe anawunikiridwa za kusowa chakudya ku {district}?",
+            sql="SELECT time_period FROM food_insecurity WHERE district = '{district}';",
+            diff="easy"
+        ),
+        Template(
+            en="Describe the food insecurity situation in {district}",
+            ny="Fotokozani za vuto la kusowa chakudya ku {district}",
+            sql="SELECT insecurity_desc_long FROM food_insecurity WHERE district = '{district}';",
+            diff="easy"
+        ),
+        Template(
+            en="Which district has the highest food insecurity level?",
+            ny="Ndi boma liti lomwe lili ndi vuto lalikulu la kusowa chakudya?",
+            sql="SELECT district, insecurity_level FROM food_insecurity ORDER BY insecurity_level DESC LIMIT 1;",
+            diff="medium"
+        ),
+        Template(
+            en="Which district has the lowest food insecurity?",
+            ny="Ndi boma liti lomwe lili ndi vuto lochepa la kusowa chakudya?",
+            sql="SELECT district, insecurity_level FROM food_insecurity ORDER BY insecurity_level ASC LIMIT 1;",
+            diff="medium"
+        ),
+        Template(
+            en="How many districts have critical food insecurity?",
+            ny="Ndi maboma angati omwe ali ndi vuto loopsa la kusowa chakudya?",
+            sql="SELECT COUNT(*) FROM food_insecurity WHERE insecurity_level >= 3;",
+            diff="medium"
+        ),
+        Template(
+            en="What is the average food insecurity percentage across all districts?",
+            ny="Ndi peresenti yapakatikati ya kusowa chakudya m'maboma onse?",
+            sql="SELECT AVG(percentage_population) FROM food_insecurity;",
+            diff="medium"
+        ),
+        Template(
+            en="List all districts with their food insecurity levels",
+            ny="Lembani maboma onse ndi milingo yawo ya kusowa chakudya",
+            sql="SELECT district, insecurity_level FROM food_insecurity ORDER BY insecurity_level DESC;",
+            diff="easy"
+        ),
+        Template(
+            en="What is the total analyzed population for food insecurity?",
+            ny="Ndi anthu angati onse omwe anawunikiridwa za kusowa chakudya?",
+            sql="SELECT SUM(analyzed_population) FROM food_insecurity;",
+            diff="easy"
+        ),
+        Template(
+            en="Which districts have food insecurity percentage above 20?",
+            ny="Ndi maboma ati omwe ali ndi peresenti ya kusowa chakudya kupitilira 20?",
+            sql="SELECT district, percentage_population FROM food_insecurity WHERE percentage_population > 20;",
+            diff="hard"
+        ),
+        Template(
+            en="Compare food insecurity between {district} and other districts",
+            ny="Yerekezani kusowa chakudya pakati pa {district} ndi maboma ena",
+            sql="SELECT district, insecurity_level, percentage_population FROM food_insecurity ORDER BY insecurity_level DESC LIMIT 5;",
+            diff="hard"
+        ),
+        Template(
+            en="What is the maximum analyzed population in any district?",
+            ny="Ndi anthu ochuluka kwambiri omwe anawunikiridwa ku boma lililonse?",
+            sql="SELECT MAX(analyzed_population) FROM food_insecurity;",
+            diff="easy"
+        ),
     ]
     
     count = 0
-    template_idx = 0
-    used_combinations = set()
+    pools = {"district": districts or ['Lilongwe'], "level": levels or [1]}
     
-    while count < TARGET_PER_TABLE and template_idx < len(templates) * 100:
-        template = templates[template_idx % len(templates)]
-        district = random.choice(districts) if districts else 'Lilongwe'
-        level = random.choice(levels) if levels else 1
-        
-        combo_key = f"{template_idx % len(templates)}_{district}_{level}"
-        if combo_key in used_combinations:
-            template_idx += 1
-            continue
-        used_combinations.add(combo_key)
-        
-        question_en = template["template_en"].format(district=district, level=level)
-        question_ny = template["template_ny"].format(district=district, level=level)
-        sql = template["sql_template"].format(district=district, level=level)
-        
-        success, result, error = db.execute(sql)
+    for template, params in iter_combinations(templates, pools):
+        if count >= TARGET_PER_TABLE:
+            break
+        success, result, error = db.run_template(template.sql, params)
         if success and result and (len(result) > 0):
             instances.append({
-                "question_en": question_en,
-                "question_ny": question_ny,
-                "sql_statement": sql,
+                "question_en": compile_format(template.en)(**params),
+                "question_ny": compile_format(template.ny)(**params),
+                "sql_statement": render_sql(template.sql, params),
                 "sql_result": format_result(result),
-                "difficulty_level": template["difficulty"],
+                "difficulty_level": template.diff,
                 "table": "food_insecurity"
             })
             count += 1
-        
-        template_idx += 1
     
     return instances[:TARGET_PER_TABLE]
 
@@ -545,139 +657,121 @@ def generate_commodity_prices_instances(db: DatabaseHelper) -> List[Dict]:
     years = db.get_distinct_values('commodity_prices', 'year')
     
     templates = [
-        {
-            "template_en": "What is the price of {commodity} in {market} market?",
-            "template_ny": "Ndi mtengo wanji wa {commodity} ku msika wa {market}?",
-            "sql_template": "SELECT price FROM commodity_prices WHERE commodity = '{commodity}' AND market = '{market}' LIMIT 1;",
-            "difficulty": "easy"
-        },
-        {
-            "template_en": "What is the average price of {commodity} in {district}?",
-            "template_ny": "Ndi mtengo wapakatikati wa {commodity} ku {district}?",
-            "sql_template": "SELECT AVG(price) FROM commodity_prices WHERE commodity = '{commodity}' AND district = '{district}';",
-            "difficulty": "medium"
-        },
-        {
-            "template_en": "Which market has the cheapest {commodity}?",
-            "template_ny": "Ndi msika uti womwe uli ndi {commodity} wotsika mtengo?",
-            "sql_template": "SELECT market, MIN(price) FROM commodity_prices WHERE commodity = '{commodity}' AND price > 0 GROUP BY market ORDER BY MIN(price) ASC LIMIT 1;",
-            "difficulty": "hard"
-        },
-        {
-            "template_en": "Which market has the most expensive {commodity}?",
-            "template_ny": "Ndi msika uti womwe uli ndi {commodity} wodula kwambiri?",
-            "sql_template": "SELECT market, MAX(price) FROM commodity_prices WHERE commodity = '{commodity}' GROUP BY market ORDER BY MAX(price) DESC LIMIT 1;",
-            "difficulty": "hard"
-        },
-        {
-            "template_en": "What commodities are sold in {market} market?",
-            "template_ny": "Ndi katundu wanji womwe amagulitsidwa ku msika wa {market}?",
-            "sql_template": "SELECT DISTINCT commodity FROM commodity_prices WHERE market = '{market}';",
-            "difficulty": "easy"
-        },
-        {
-            "template_en": "How many markets are in {district}?",
-            "template_ny": "Ndi misika ingati ku {district}?",
-            "sql_template": "SELECT COUNT(DISTINCT market) FROM commodity_prices WHERE district = '{district}';",
-            "difficulty": "easy"
-        },
-        {
-            "template_en": "What was the price of {commodity} in {month}?",
-            "template_ny": "Mtengo wa {commodity} unali bwanji mu {month}?",
-            "sql_template": "SELECT AVG(price) FROM commodity_prices WHERE commodity = '{commodity}' AND month_name = '{month}';",
-            "difficulty": "medium"
-        },
-        {
-            "template_en": "List all markets in {district}",
-            "template_ny": "Lembani misika yonse ku {district}",
-            "sql_template": "SELECT DISTINCT market FROM commodity_prices WHERE district = '{district}';",
-            "difficulty": "easy"
-        },
-        {
-            "template_en": "What is the price range of {commodity}?",
-            "template_ny": "Ndi mtengo wochepa ndi wokwera wa {commodity}?",
-            "sql_template": "SELECT MIN(price), MAX(price) FROM commodity_prices WHERE commodity = '{commodity}' AND price > 0;",
-            "difficulty": "medium"
-        },
-        {
-            "template_en": "Which district has the lowest average price for {commodity}?",
-            "template_ny": "Ndi boma liti lomwe lili ndi mtengo wotsika wa {commodity}?",
-            "sql_template": "SELECT district, AVG(price) as avg_price FROM commodity_prices WHERE commodity = '{commodity}' AND price > 0 GROUP BY district ORDER BY avg_price ASC LIMIT 1;",
-            "difficulty": "hard"
-        },
-        {
-            "template_en": "How many different commodities are tracked in {district}?",
-            "template_ny": "Ndi mitundu ingati ya katundu yomwe imalembedwa ku {district}?",
-            "sql_template": "SELECT COUNT(DISTINCT commodity) FROM commodity_prices WHERE district = '{district}';",
-            "difficulty": "easy"
-        },
-        {
-            "template_en": "What is the total number of price records in {year}?",
-            "template_ny": "Ndi malembedwe angati a mitengo mu {year}?",
-            "sql_template": "SELECT COUNT(*) FROM commodity_prices WHERE year = {year};",
-            "difficulty": "easy"
-        },
-        {
-            "template_en": "List the top 5 most expensive commodities in {district}",
-            "template_ny": "Lembani katundu 5 wodula kwambiri ku {district}",
-            "sql_template": "SELECT commodity, MAX(price) as max_price FROM commodity_prices WHERE district = '{district}' GROUP BY commodity ORDER BY max_price DESC LIMIT 5;",
-            "difficulty": "hard"
-        },
-        {
-            "template_en": "What is the collection date for prices in {market}?",
-            "template_ny": "Ndi tsiku lanji lomwe anasonkhanitsa mitengo ku {market}?",
-            "sql_template": "SELECT DISTINCT collection_date FROM commodity_prices WHERE market = '{market}' LIMIT 5;",
-            "difficulty": "easy"
-        },
-        {
-            "template_en": "Which EPA covers {market} market?",
-            "template_ny": "Ndi EPA yanji yomwe imayangana msika wa {market}?",
-            "sql_template": "SELECT DISTINCT epa_name FROM commodity_prices WHERE market = '{market}';",
-            "difficulty": "easy"
-        },
+        Template(
+            en="What is the price of {commodity} in {market} market?",
+            ny="Ndi mtengo wanji wa {commodity} ku msika wa {market}?",
+            sql="SELECT price FROM commodity_prices WHERE commodity = '{commodity}' AND market = '{market}' LIMIT 1;",
+            diff="easy"
+        ),
+        Template(
+            en="What is the average price of {commodity} in {district}?",
+            ny="Ndi mtengo wapakatikati wa {commodity} ku {district}?",
+            sql="SELECT AVG(price) FROM commodity_prices WHERE commodity = '{commodity}' AND district = '{district}';",
+            diff="medium"
+        ),
+        Template(
+            en="Which market has the cheapest {commodity}?",
+            ny="Ndi msika uti womwe uli ndi {commodity} wotsika mtengo?",
+            sql="SELECT market, MIN(price) FROM commodity_prices WHERE commodity = '{commodity}' AND price > 0 GROUP BY market ORDER BY MIN(price) ASC LIMIT 1;",
+            diff="hard"
+        ),
+        Template(
+            en="Which market has the most expensive {commodity}?",
+            ny="Ndi msika uti womwe uli ndi {commodity} wodula kwambiri?",
+            sql="SELECT market, MAX(price) FROM commodity_prices WHERE commodity = '{commodity}' GROUP BY market ORDER BY MAX(price) DESC LIMIT 1;",
+            diff="hard"
+        ),
+        Template(
+            en="What commodities are sold in {market} market?",
+            ny="Ndi katundu wanji womwe amagulitsidwa ku msika wa {market}?",
+            sql="SELECT DISTINCT commodity FROM commodity_prices WHERE market = '{market}';",
+            diff="easy"
+        ),
+        Template(
+            en="How many markets are in {district}?",
+            ny="Ndi misika ingati ku {district}?",
+            sql="SELECT COUNT(DISTINCT market) FROM commodity_prices WHERE district = '{district}';",
+            diff="easy"
+        ),
+        Template(
+            en="What was the price of {commodity} in {month}?",
+            ny="Mtengo wa {commodity} unali bwanji mu {month}?",
+            sql="SELECT AVG(price) FROM commodity_prices WHERE commodity = '{commodity}' AND month_name = '{month}';",
+            diff="medium"
+        ),
+        Template(
+            en="List all markets in {district}",
+            ny="Lembani misika yonse ku {district}",
+            sql="SELECT DISTINCT market FROM commodity_prices WHERE district = '{district}';",
+            diff="easy"
+        ),
+        Template(
+            en="What is the price range of {commodity}?",
+            ny="Ndi mtengo wochepa ndi wokwera wa {commodity}?",
+            sql="SELECT MIN(price), MAX(price) FROM commodity_prices WHERE commodity = '{commodity}' AND price > 0;",
+            diff="medium"
+        ),
+        Template(
+            en="Which district has the lowest average price for {commodity}?",
+            ny="Ndi boma liti lomwe lili ndi mtengo wotsika wa {commodity}?",
+            sql="SELECT district, AVG(price) as avg_price FROM commodity_prices WHERE commodity = '{commodity}' AND price > 0 GROUP BY district ORDER BY avg_price ASC LIMIT 1;",
+            diff="hard"
+        ),
+        Template(
+            en="How many different commodities are tracked in {district}?",
+            ny="Ndi mitundu ingati ya katundu yomwe imalembedwa ku {district}?",
+            sql="SELECT COUNT(DISTINCT commodity) FROM commodity_prices WHERE district = '{district}';",
+            diff="easy"
+        ),
+        Template(
+            en="What is the total number of price records in {year}?",
+            ny="Ndi malembedwe angati a mitengo mu {year}?",
+            sql="SELECT COUNT(*) FROM commodity_prices WHERE year = {year};",
+            diff="easy"
+        ),
+        Template(
+            en="List the top 5 most expensive commodities in {district}",
+            ny="Lembani katundu 5 wodula kwambiri ku {district}",
+            sql="SELECT commodity, MAX(price) as max_price FROM commodity_prices WHERE district = '{district}' GROUP BY commodity ORDER BY max_price DESC LIMIT 5;",
+            diff="hard"
+        ),
+        Template(
+            en="What is the collection date for prices in {market}?",
+            ny="Ndi tsiku lanji lomwe anasonkhanitsa mitengo ku {market}?",
+            sql="SELECT DISTINCT collection_date FROM commodity_prices WHERE market = '{market}' LIMIT 5;",
+            diff="easy"
+        ),
+        Template(
+            en="Which EPA covers {market} market?",
+            ny="Ndi EPA yanji yomwe imayangana msika wa {market}?",
+            sql="SELECT DISTINCT epa_name FROM commodity_prices WHERE market = '{market}';",
+            diff="easy"
+        ),
     ]
     
     count = 0
-    template_idx = 0
-    used_combinations = set()
-    
-    while count < TARGET_PER_TABLE and template_idx < len(templates) * 100:
-        template = templates[template_idx % len(templates)]
-        district = random.choice(districts) if districts else 'Lilongwe'
-        market = random.choice(markets) if markets else 'Lilongwe'
-        commodity = random.choice(commodities) if commodities else 'Maize'
-        month = random.choice(months) if months else 'January'
-        year = random.choice(years) if years else 2024
-        
-        combo_key = f"{template_idx % len(templates)}_{district}_{market}_{commodity}_{month}_{year}"
-        if combo_key in used_combinations:
-            template_idx += 1
-            continue
-        used_combinations.add(combo_key)
-        
-        question_en = template["template_en"].format(
-            district=district, market=market, commodity=commodity, month=month, year=year
-        )
-        question_ny = template["template_ny"].format(
-            district=district, market=market, commodity=commodity, month=month, year=year
-        )
-        sql = template["sql_template"].format(
-            district=district, market=market, commodity=commodity, month=month, year=year
-        )
-        
-        success, result, error = db.execute(sql)
+    pools = {
+        "district": districts or ['Lilongwe'],
+        "market": markets or ['Lilongwe'],
+        "commodity": commodities or ['Maize'],
+        "month": months or ['January'],
+        "year": years or [2024],
+    }
+    
+    for template, params in iter_combinations(templates, pools):
+        if count >= TARGET_PER_TABLE:
+            break
+        success, result, error = db.run_template(template.sql, params)
         if success and result and (len(result) > 0) and result[0][0] is not None:
             instances.append({
-                "question_en": question_en,
-                "question_ny": question_ny,
-                "sql_statement": sql,
+                "question_en": compile_format(template.en)(**params),
+                "question_ny": compile_format(template.ny)(**params),
+                "sql_statement": render_sql(template.sql, params),
                 "sql_result": format_result(result),
-                "difficulty_level": template["difficulty"],
+                "difficulty_level": template.diff,
                 "table": "commodity_prices"
             })
             count += 1
-        
-        template_idx += 1
     
     return instances[:TARGET_PER_TABLE]
 
@@ -692,203 +786,185 @@ def generate_mse_daily_instances(db: DatabaseHelper) -> List[Dict]:
     dates = db.get_distinct_values('mse_daily', 'trade_date', limit=20)
     
     templates = [
-        {
-            "template_en": "What is the close price of {ticker} stock?",
-            "template_ny": "Ndi mtengo wotsekedwa wa share ya {ticker}?",
-            "sql_template": "SELECT close_price FROM mse_daily WHERE ticker = '{ticker}' ORDER BY trade_date DESC LIMIT 1;",
-            "difficulty": "easy"
-        },
-        {
-            "template_en": "What is the trading volume for {ticker}?",
-            "template_ny": "Ndi kuchuluka kwa malonda a share ya {ticker}?",
-            "sql_template": "SELECT volume FROM mse_daily WHERE ticker = '{ticker}' ORDER BY trade_date DESC LIMIT 1;",
-            "difficulty": "easy"
-        },
-        {
-            "template_en": "What is the PE ratio for {company}?",
-            "template_ny": "Ndi PE ratio ya {company}?",
-            "sql_template": "SELECT pe_ratio FROM mse_daily WHERE company_name = '{company}' ORDER BY trade_date DESC LIMIT 1;",
-            "difficulty": "medium"
-        },
-        {
-            "template_en": "What is the market cap of {ticker}?",
-            "template_ny": "Ndi market cap ya {ticker}?",
-            "sql_template": "SELECT market_cap_mwk_mn FROM mse_daily WHERE ticker = '{ticker}' ORDER BY trade_date DESC LIMIT 1;",
-            "difficulty": "easy"
-        },
-        {
-            "template_en": "Which stocks are in the {sector} sector?",
-            "template_ny": "Ndi ma share ati omwe ali mu gawo la {sector}?",
-            "sql_template": "SELECT DISTINCT ticker, company_name FROM mse_daily WHERE sector = '{sector}';",
-            "difficulty": "easy"
-        },
-        {
-            "template_en": "What was the highest price of {ticker}?",
-            "template_ny": "Mtengo wokwera kwambiri wa {ticker} unali bwanji?",
-            "sql_template": "SELECT MAX(high_price) FROM mse_daily WHERE ticker = '{ticker}';",
-            "difficulty": "easy"
-        },
-        {
-            "template_en": "What was the lowest price of {ticker}?",
-            "template_ny": "Mtengo wotsika kwambiri wa {ticker} unali bwanji?",
-            "sql_template": "SELECT MIN(low_price) FROM mse_daily WHERE ticker = '{ticker}' AND low_price > 0;",
-            "difficulty": "easy"
-        },
-        {
-            "template_en": "What is the dividend yield of {ticker}?",
-            "template_ny": "Ndi dividend yield ya {ticker}?",
-            "sql_template": "SELECT dividend_yield_pct FROM mse_daily WHERE ticker = '{ticker}' ORDER BY trade_date DESC LIMIT 1;",
-            "difficulty": "medium"
-        },
-        {
-            "template_en": "What is the earnings yield of {ticker}?",
-            "template_ny": "Ndi earnings yield ya {ticker}?",
-            "sql_template": "SELECT earnings_yield_pct FROM mse_daily WHERE ticker = '{ticker}' ORDER BY trade_date DESC LIMIT 1;",
-            "difficulty": "medium"
-        },
-        {
-            "template_en": "How many shares are outstanding for {ticker}?",
-            "template_ny": "Ndi ma share angati a {ticker} omwe ali panja?",
-            "sql_template": "SELECT shares_outstanding FROM mse_daily WHERE ticker = '{ticker}' ORDER BY trade_date DESC LIMIT 1;",
-            "difficulty": "easy"
-        },
-        {
-            "template_en": "What is the profit after tax for {company}?",
-            "template_ny": "Ndi phindu pambuyo pa msonkho la {company}?",
-            "sql_template": "SELECT profit_after_tax_mwk_mn FROM mse_daily WHERE company_name = '{company}' ORDER BY trade_date DESC LIMIT 1;",
-            "difficulty": "medium"
-        },
-        {
-            "template_en": "List all stocks traded on {date}",
-            "template_ny": "Lembani ma share onse omwe anagulitsidwa pa {date}",
-            "sql_template": "SELECT DISTINCT ticker, company_name FROM mse_daily WHERE trade_date = '{date}';",
-            "difficulty": "easy"
-        },
-        {
-            "template_en": "What is the bid price for {ticker}?",
-            "template_ny": "Ndi mtengo wogula wa {ticker}?",
-            "sql_template": "SELECT bid_price FROM mse_daily WHERE ticker = '{ticker}' ORDER BY trade_date DESC LIMIT 1;",
-            "difficulty": "easy"
-        },
-        {
-            "template_en": "What is the ask price for {ticker}?",
-            "template_ny": "Ndi mtengo wogulitsa wa {ticker}?",
-            "sql_template": "SELECT ask_price FROM mse_daily WHERE ticker = '{ticker}' ORDER BY trade_date DESC LIMIT 1;",
-            "difficulty": "easy"
-        },
-        {
-            "template_en": "Which stock has the highest market cap?",
-            "template_ny": "Ndi share yiti yomwe ili ndi market cap yayikulu?",
-            "sql_template": "SELECT ticker, company_name, MAX(market_cap_mwk_mn) FROM mse_daily WHERE market_cap_mwk_mn IS NOT NULL;",
-            "difficulty": "hard"
-        },
-        {
-            "template_en": "What is the PBV ratio for {ticker}?",
-            "template_ny": "Ndi PBV ratio ya {ticker}?",
-            "sql_template": "SELECT pbv_ratio FROM mse_daily WHERE ticker = '{ticker}' ORDER BY trade_date DESC LIMIT 1;",
-            "difficulty": "medium"
-        },
-        {
-            "template_en": "How many different sectors are listed on MSE?",
-            "template_ny": "Ndi magawo angati osiyanasiyana omwe alipo pa MSE?",
-            "sql_template": "SELECT COUNT(DISTINCT sector) FROM mse_daily WHERE sector IS NOT NULL;",
-            "difficulty": "easy"
-        },
-        {
-            "template_en": "What was the previous close price of {ticker}?",
-            "template_ny": "Mtengo womaliza wapitawo wa {ticker} unali bwanji?",
-            "sql_template": "SELECT previous_close_price FROM mse_daily WHERE ticker = '{ticker}' ORDER BY trade_date DESC LIMIT 1;",
-            "difficulty": "easy"
-        },
+        Template(
+            en="What is the close price of {ticker} stock?",
+            ny="Ndi mtengo wotsekedwa wa share ya {ticker}?",
+            sql="SELECT close_price FROM mse_daily WHERE ticker = '{ticker}' ORDER BY trade_date DESC LIMIT 1;",
+            diff="easy"
+        ),
+        Template(
+            en="What is the trading volume for {ticker}?",
+            ny="Ndi kuchuluka kwa malonda a share ya {ticker}?",
+            sql="SELECT volume FROM mse_daily WHERE ticker = '{ticker}' ORDER BY trade_date DESC LIMIT 1;",
+            diff="easy"
+        ),
+        Template(
+            en="What is the PE ratio for {company}?",
+            ny="Ndi PE ratio ya {company}?",
+            sql="SELECT pe_ratio FROM mse_daily WHERE company_name = '{company}' ORDER BY trade_date DESC LIMIT 1;",
+            diff="medium"
+        ),
+        Template(
+            en="What is the market cap of {ticker}?",
+            ny="Ndi market cap ya {ticker}?",
+            sql="SELECT market_cap_mwk_mn FROM mse_daily WHERE ticker = '{ticker}' ORDER BY trade_date DESC LIMIT 1;",
+            diff="easy"
+        ),
+        Template(
+            en="Which stocks are in the {sector} sector?",
+            ny="Ndi ma share ati omwe ali mu gawo la {sector}?",
+            sql="SELECT DISTINCT ticker, company_name FROM mse_daily WHERE sector = '{sector}';",
+            diff="easy"
+        ),
+        Template(
+            en="What was the highest price of {ticker}?",
+            ny="Mtengo wokwera kwambiri wa {ticker} unali bwanji?",
+            sql="SELECT MAX(high_price) FROM mse_daily WHERE ticker = '{ticker}';",
+            diff="easy"
+        ),
+        Template(
+            en="What was the lowest price of {ticker}?",
+            ny="Mtengo wotsika kwambiri wa {ticker} unali bwanji?",
+            sql="SELECT MIN(low_price) FROM mse_daily WHERE ticker = '{ticker}' AND low_price > 0;",
+            diff="easy"
+        ),
+        Template(
+            en="What is the dividend yield of {ticker}?",
+            ny="Ndi dividend yield ya {ticker}?",
+            sql="SELECT dividend_yield_pct FROM mse_daily WHERE ticker = '{ticker}' ORDER BY trade_date DESC LIMIT 1;",
+            diff="medium"
+        ),
+        Template(
+            en="What is the earnings yield of {ticker}?",
+            ny="Ndi earnings yield ya {ticker}?",
+            sql="SELECT earnings_yield_pct FROM mse_daily WHERE ticker = '{ticker}' ORDER BY trade_date DESC LIMIT 1;",
+            diff="medium"
+        ),
+        Template(
+            en="How many shares are outstanding for {ticker}?",
+            ny="Ndi ma share angati a {ticker} omwe ali panja?",
+            sql="SELECT shares_outstanding FROM mse_daily WHERE ticker = '{ticker}' ORDER BY trade_date DESC LIMIT 1;",
+            diff="easy"
+        ),
+        Template(
+            en="What is the profit after tax for {company}?",
+            ny="Ndi phindu pambuyo pa msonkho la {company}?",
+            sql="SELECT profit_after_tax_mwk_mn FROM mse_daily WHERE company_name = '{company}' ORDER BY trade_date DESC LIMIT 1;",
+            diff="medium"
+        ),
+        Template(
+            en="List all stocks traded on {date}",
+            ny="Lembani ma share onse omwe anagulitsidwa pa {date}",
+            sql="SELECT DISTINCT ticker, company_name FROM mse_daily WHERE trade_date = '{date}';",
+            diff="easy"
+        ),
+        Template(
+            en="What is the bid price for {ticker}?",
+            ny="Ndi mtengo wogula wa {ticker}?",
+            sql="SELECT bid_price FROM mse_daily WHERE ticker = '{ticker}' ORDER BY trade_date DESC LIMIT 1;",
+            diff="easy"
+        ),
+        Template(
+            en="What is the ask price for {ticker}?",
+            ny="Ndi mtengo wogulitsa wa {ticker}?",
+            sql="SELECT ask_price FROM mse_daily WHERE ticker = '{ticker}' ORDER BY trade_date DESC LIMIT 1;",
+            diff="easy"
+        ),
+        Template(
+            en="Which stock has the highest market cap?",
+            ny="Ndi share yiti yomwe ili ndi market cap yayikulu?",
+            sql="SELECT ticker, company_name, MAX(market_cap_mwk_mn) FROM mse_daily WHERE market_cap_mwk_mn IS NOT NULL;",
+            diff="hard"
+        ),
+        Template(
+            en="What is the PBV ratio for {ticker}?",
+            ny="Ndi PBV ratio ya {ticker}?",
+            sql="SELECT pbv_ratio FROM mse_daily WHERE ticker = '{ticker}' ORDER BY trade_date DESC LIMIT 1;",
+            diff="medium"
+        ),
+        Template(
+            en="How many different sectors are listed on MSE?",
+            ny="Ndi magawo angati osiyanasiyana omwe alipo pa MSE?",
+            sql="SELECT COUNT(DISTINCT sector) FROM mse_daily WHERE sector IS NOT NULL;",
+            diff="easy"
+        ),
+        Template(
+            en="What was the previous close price of {ticker}?",
+            ny="Mtengo womaliza wapitawo wa {ticker} unali bwanji?",
+            sql="SELECT previous_close_price FROM mse_daily WHERE ticker = '{ticker}' ORDER BY trade_date DESC LIMIT 1;",
+            diff="easy"
+        ),
     ]
     
     count = 0
-    template_idx = 0
-    used_combinations = set()
-    
-    while count < TARGET_PER_TABLE and template_idx < len(templates) * 100:
-        template = templates[template_idx % len(templates)]
-        ticker = random.choice(tickers) if tickers else 'AIRTEL'
-        company = random.choice(companies) if companies else 'Airtel Malawi'
-        sector = random.choice(sectors) if sectors else 'Banking'
-        date = random.choice(dates) if dates else '2025-02-06'
-        
-        combo_key = f"{template_idx % len(templates)}_{ticker}_{company}_{sector}_{date}"
-        if combo_key in used_combinations:
-            template_idx += 1
-            continue
-        used_combinations.add(combo_key)
-        
-        question_en = template["template_en"].format(
-            ticker=ticker, company=company, sector=sector, date=date
-        )
-        question_ny = template["template_ny"].format(
-            ticker=ticker, company=company, sector=sector, date=date
-        )
-        sql = template["sql_template"].format(
-            ticker=ticker, company=company, sector=sector, date=date
-        )
-        
-        success, result, error = db.execute(sql)
+    pools = {
+        "ticker": tickers or ['AIRTEL'],
+        "company": companies or ['Airtel Malawi'],
+        "sector": sectors or ['Banking'],
+        "date": dates or ['2025-02-06'],
+    }
+    
+    for template, params in iter_combinations(templates, pools):
+        if count >= TARGET_PER_TABLE:
+            break
+        # Questions and SQL text are rendered only for accepted candidates
+        success, result, error = db.run_template(template.sql, params)
         if success and result and (len(result) > 0) and result[0][0] is not None:
             instances.append({
-                "question_en": question_en,
-                "question_ny": question_ny,
-                "sql_statement": sql,
+                "question_en": compile_format(template.en)(**params),
+                "question_ny": compile_format(template.ny)(**params),
+                "sql_statement": render_sql(template.sql, params),
                 "sql_result": format_result(result),
-                "difficulty_level": template["difficulty"],
+                "difficulty_level": template.diff,
                 "table": "mse_daily"
             })
             count += 1
-        
-        template_idx += 1
     
     return instances[:TARGET_PER_TABLE]
 
 
+GENERATORS = [
+    ("production", generate_production_instances),
+    ("population", generate_population_instances),
+    ("food_insecurity", generate_food_insecurity_instances),
+    ("commodity_prices", generate_commodity_prices_instances),
+    ("mse_daily", generate_mse_daily_instances),
+]
+
+
+def run_generator(table: str, db_path: str = DATABASE_PATH) -> List[Dict]:
+    """Run one table's generator in a worker process on its own read-only connection to db_path.
+
+    Each table gets its own seeded random stream, so the output does not depend on
+    which worker runs it or in what order.
+    """
+    random.seed(f"42:{table}")
+    db = DatabaseHelper(db_path)
+    try:
+        return dict(GENERATORS)[table](db)
+    finally:
+        db.close()
+
+
 def main():
     print("=" * 70)
     print("CHICHEWA TEXT-TO-SQL DATASET CORRECTION")
     print("=" * 70 + "\n")
     
-    # Connect to database
-    print("[1] Connecting to database...")
-    db = DatabaseHelper(DATABASE_PATH)
-    
-    # Generate instances for each table
+    # Generate instances for each table, one worker process per table
+    print("[1] Generating instances for all tables...")
     all_instances = []
-    
-    print("[2] Generating production instances...")
-    production_instances = generate_production_instances(db)
-    print(f"    Generated {len(production_instances)} production instances")
-    all_instances.extend(production_instances)
-    
-    print("[3] Generating population instances...")
-    population_instances = generate_population_instances(db)
-    print(f"    Generated {len(population_instances)} population instances")
-    all_instances.extend(population_instances)
-    
-    print("[4] Generating food_insecurity instances...")
-    food_insecurity_instances = generate_food_insecurity_instances(db)
-    print(f"    Generated {len(food_insecurity_instances)} food_insecurity instances")
-    all_instances.extend(food_insecurity_instances)
-    
-    print("[5] Generating commodity_prices instances...")
-    commodity_prices_instances = generate_commodity_prices_instances(db)
-    print(f"    Generated {len(commodity_prices_instances)} commodity_prices instances")
-    all_instances.extend(commodity_prices_instances)
-    
-    print("[6] Generating mse_daily instances...")
-    mse_daily_instances = generate_mse_daily_instances(db)
-    print(f"    Generated {len(mse_daily_instances)} mse_daily instances")
-    all_instances.extend(mse_daily_instances)
-    
-    db.close()
+    with ProcessPoolExecutor(max_workers=len(GENERATORS)) as executor:
+        tables = [table for table, _ in GENERATORS]
+        results = executor.map(run_generator, tables, itertools.repeat(DATABASE_PATH, len(tables)))
+        for step, ((table, _), instances) in enumerate(zip(GENERATORS, results), start=2):
+            print(f"[{step}] Generated {len(instances)} {table} instances")
+            all_instances.extend(instances)
     
     # Save corrected dataset
     print(f"\n[7] Saving corrected dataset to {OUTPUT_PATH}...")
     with open(OUTPUT_PATH, 'w', encoding='utf-8') as f:
-        json.dump(all_instances, f, indent=2, ensure_ascii=False)
+        write_json_array(all_instances, f)
     
     # Summary
     print("\n" + "=" * 70)
@@ -897,13 +973,8 @@ def main():
     print(f"Total instances: {len(all_instances)}")
     
     # Count by table
-    table_counts = {}
-    difficulty_counts = {}
-    for inst in all_instances:
-        table = inst['table']
-        diff = inst['difficulty_level']
-        table_counts[table] = table_counts.get(table, 0) + 1
-        difficulty_counts[diff] = difficulty_counts.get(diff, 0) + 1
+    table_counts = Counter(inst['table'] for inst in all_instances)
+    difficulty_counts = Counter(inst['difficulty_level'] for inst in all_instances)
     
     print("\nBy table:")
     for table, count in sorted(table_counts.items()):
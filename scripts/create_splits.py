@@ -4,7 +4,11 @@ Usage:
   python scripts/create_splits.py
 This writes train.json, dev.json, test.json and split_verification.json in the project root.
 """
-import json, os, math, random, collections
+import json, os, random, collections
+
+import numpy as np
+
+from dataset_io import write_json_array
 
 WD = os.path.dirname(os.path.dirname(__file__))
 ALL_PATH = os.path.join(WD, 'data', 'all.json')
@@ -23,8 +27,6 @@ if __name__ == '__main__':
         items = json.load(f)
 
     n = len(items)
-    id_to_item = {it['id']: it for it in items}
-    all_ids = [it['id'] for it in items]
 
     # group by (difficulty, table)
     groups = collections.defaultdict(list)
@@ -36,90 +38,35 @@ if __name__ == '__main__':
     target_dev = int(round(n * DEV_FRAC))
     target_test = n - target_train - target_dev
 
-    group_alloc = {}
-    for k, ids in groups.items():
-        g = len(ids)
-        ideal_train = g * TRAIN_FRAC
-        ideal_dev = g * DEV_FRAC
-        f_train = math.floor(ideal_train)
-        f_dev = math.floor(ideal_dev)
-        f_test = g - f_train - f_dev
-        group_alloc[k] = {
-            'size': g,
-            'ideal_train': ideal_train,
-            'ideal_dev': ideal_dev,
-            'train': f_train,
-            'dev': f_dev,
-            'test': f_test,
-        }
-
-    def adjust_for_target(split_key, target_total):
-        current_total = sum(v[split_key] for v in group_alloc.values())
-        deficit = target_total - current_total
-        if deficit == 0:
+    # Largest-remainder apportionment per group; rows follow group insertion order
+    keys = list(groups)
+    sizes = np.array([len(groups[k]) for k in keys])
+    ideal = sizes[:, None] * np.array([TRAIN_FRAC, DEV_FRAC])
+    counts = np.floor(ideal).astype(int)  # columns: train, dev
+
+    def adjust_for_target(col, target_total):
+        deficit = target_total - int(counts[:, col].sum())
+        if deficit <= 0:
             return
-        fracs = []
-        for k, v in group_alloc.items():
-            frac = v['ideal_' + split_key] - v[split_key]
-            capacity = v['size'] - v['train'] - v['dev']
-            fracs.append((frac, k, capacity))
-        fracs.sort(key=lambda x: x[0], reverse=True)
-        i = 0
-        while deficit > 0 and i < len(fracs):
-            frac, k, cap = fracs[i]
-            if cap > 0:
-                group_alloc[k][split_key] += 1
-                group_alloc[k]['test'] = group_alloc[k]['size'] - group_alloc[k]['train'] - group_alloc[k]['dev']
+        # Hand the remainder to the largest fractional parts (ties keep group order),
+        # skipping groups that had no test items left to give up
+        capacity = sizes - counts.sum(axis=1)
+        order = np.argsort(counts[:, col] - ideal[:, col], kind='stable')
+        winners = order[capacity[order] > 0][:deficit]
+        counts[winners, col] += 1
+        deficit -= len(winners)
+        idx = 0
+        while deficit > 0:
+            g = idx % len(keys)
+            if counts[g, col] < sizes[g]:
+                counts[g, col] += 1
                 deficit -= 1
-            i += 1
-        if deficit > 0:
-            keys = list(group_alloc.keys())
-            idx = 0
-            while deficit > 0:
-                k = keys[idx % len(keys)]
-                if group_alloc[k][split_key] < group_alloc[k]['size']:
-                    group_alloc[k][split_key] += 1
-                    group_alloc[k]['test'] = group_alloc[k]['size'] - group_alloc[k]['train'] - group_alloc[k]['dev']
-                    deficit -= 1
-                idx += 1
-
-    adjust_for_target('train', target_train)
-    adjust_for_target('dev', target_dev)
-
-    # Final reconciliation
-    sum_train = sum(v['train'] for v in group_alloc.values())
-    sum_dev = sum(v['dev'] for v in group_alloc.values())
-    if sum_train != target_train:
-        diff = target_train - sum_train
-        for k, v in group_alloc.items():
-            if diff == 0:
-                break
-            can = v['test'] if diff > 0 else v['train']
-            change = min(abs(diff), can)
-            if change <= 0:
-                continue
-            if diff > 0:
-                group_alloc[k]['train'] += change
-            else:
-                group_alloc[k]['train'] -= change
-            group_alloc[k]['test'] = group_alloc[k]['size'] - group_alloc[k]['train'] - group_alloc[k]['dev']
-            diff = target_train - sum(v['train'] for v in group_alloc.values())
-
-    if sum_dev != target_dev:
-        diff = target_dev - sum_dev
-        for k, v in group_alloc.items():
-            if diff == 0:
-                break
-            can = v['test'] if diff > 0 else v['dev']
-            change = min(abs(diff), can)
-            if change <= 0:
-                continue
-            if diff > 0:
-                group_alloc[k]['dev'] += change
-            else:
-                group_alloc[k]['dev'] -= change
-            group_alloc[k]['test'] = group_alloc[k]['size'] - group_alloc[k]['train'] - group_alloc[k]['dev']
-            diff = target_dev - sum(v['dev'] for v in group_alloc.values())
+            idx += 1
+
+    adjust_for_target(0, target_train)
+    adjust_for_target(1, target_dev)
+    assert counts[:, 0].sum() == target_train and counts[:, 1].sum() == target_dev
+    group_alloc = {k: {'train': int(t), 'dev': int(d)} for k, (t, d) in zip(keys, counts)}
 
     # Assign ids deterministically per group
     rnd = random.Random(SEED)
@@ -143,25 +90,30 @@ if __name__ == '__main__':
     all_assigned = set(train_ids) | set(dev_ids) | set(test_ids)
     assert len(all_assigned) == n, f'assigned {len(all_assigned)} != total {n}'
 
-    # Preserve original order
-    train_list = [id_to_item[i] for i in all_ids if i in set(train_ids)]
-    dev_list = [id_to_item[i] for i in all_ids if i in set(dev_ids)]
-    test_list = [id_to_item[i] for i in all_ids if i in set(test_ids)]
+    # Preserve original order: one pass over items, routed by each id's split
+    train_list, dev_list, test_list = [], [], []
+    split_of = {}
+    for ids, lst in ((train_ids, train_list), (dev_ids, dev_list), (test_ids, test_list)):
+        for i in ids:
+            split_of[i] = lst
+    for it in items:
+        split_of[it['id']].append(it)
 
     # Write outputs
     with open(TRAIN_OUT, 'w', encoding='utf-8') as f:
-        json.dump(train_list, f, ensure_ascii=False, indent=2)
+        write_json_array(train_list, f)
     with open(DEV_OUT, 'w', encoding='utf-8') as f:
-        json.dump(dev_list, f, ensure_ascii=False, indent=2)
+        write_json_array(dev_list, f)
     with open(TEST_OUT, 'w', encoding='utf-8') as f:
-        json.dump(test_list, f, ensure_ascii=False, indent=2)
+        write_json_array(test_list, f)
 
     # Verification report
-    from collections import Counter
-
     def breakdown(lst):
-        diff = Counter([it['difficulty_level'] for it in lst])
-        tab = Counter([it['table'] for it in lst])
+        # One pass tallying both fields; keys keep first-seen order like Counter did
+        diff, tab = {}, {}
+        for it in lst:
+            diff[it['difficulty_level']] = diff.get(it['difficulty_level'], 0) + 1
+            tab[it['table']] = tab.get(it['table'], 0) + 1
         return diff, tab
 
     train_diff, train_tab = breakdown(train_list)
@@ -172,12 +124,12 @@ if __name__ == '__main__':
         'total': n,
         'targets': {'train': target_train, 'dev': target_dev, 'test': target_test},
         'actual': {'train': len(train_list), 'dev': len(dev_list), 'test': len(test_list)},
-        'train_diff': dict(train_diff),
-        'dev_diff': dict(dev_diff),
-        'test_diff': dict(test_diff),
-        'train_tab': dict(train_tab),
-        'dev_tab': dict(dev_tab),
-        'test_tab': dict(test_tab),
+        'train_diff': train_diff,
+        'dev_diff': dev_diff,
+        'test_diff': test_diff,
+        'train_tab': train_tab,
+        'dev_tab': dev_tab,
+        'test_tab': test_tab,
     }
     with open(VER_OUT, 'w', encoding='utf-8') as f:
         json.dump(ver_report, f, ensure_ascii=False, indent=2)
@@ -0,0 +1,87 @@
+"""
+Template rendering, result formatting and JSON output shared by the dataset scripts.
+"""
+
+import functools
+import json
+import re
+import textwrap
+from typing import Any, Dict, Iterable, Tuple
+
+
+_FIELD_RX = re.compile(r"(?<!\{)\{(\w+)\}")
+
+
+@functools.lru_cache(maxsize=None)
+def template_fields(fmt: str) -> Tuple[str, ...]:
+    """Placeholder names used by a format string, each once, sorted."""
+    return tuple(sorted(set(_FIELD_RX.findall(fmt))))
+
+
+@functools.lru_cache(maxsize=None)
+def compile_format(fmt: str):
+    """Compile a `str.format` template into an equivalent f-string renderer.
+
+    `"... {district} ..."` becomes `lambda district, **_: f"... {district} ..."`, so rendering
+    skips re-parsing the format string on every call.
+    """
+    args = "".join(f"{name}, " for name in template_fields(fmt))
+    return eval(f"lambda {args}**_: f{fmt!r}")
+
+
+_PLACEHOLDER_RX = re.compile(r"('?)(?<!\{)\{(\w+)\}'?")
+
+
+@functools.lru_cache(maxsize=None)
+def compile_param_sql(sql_template: str) -> Tuple[str, Tuple[Tuple[str, bool], ...]]:
+    """Turn a SQL template into `?`-parameterized SQL plus its (name, quoted) fields.
+
+    Every binding then reuses one prepared statement from the connection's statement
+    cache. Quoted placeholders are bound as text, matching the literal in the rendered SQL.
+    """
+    fields = tuple((name, bool(quote)) for quote, name in _PLACEHOLDER_RX.findall(sql_template))
+    sql = _PLACEHOLDER_RX.sub("?", sql_template).replace("{{", "{").replace("}}", "}")
+    return sql, fields
+
+
+def format_row(row: tuple) -> str:
+    """Format one result row as a tuple literal, rounding floats to 2 places."""
+    # `type(v) is float` skips the isinstance MRO walk; sqlite3 only yields exact floats
+    return repr(tuple(round(v, 2) if type(v) is float else v for v in row))
+
+
+def format_result(result: Any) -> str:
+    """Format SQL result for storage in JSON as proper SQL-style tuples."""
+    if not result:
+        return "[]"
+
+    # Same text as str() of the list of rounded tuples, without building the list first
+    return "[" + ", ".join(map(format_row, result)) + "]"
+
+
+_encode_json = json.JSONEncoder(ensure_ascii=False).encode
+_encode_json_str = json.encoder.encode_basestring  # C string encoder, ensure_ascii=False flavour
+_JSON_SCALARS = (str, int, float, bool, type(None))
+
+
+def _encode_json_value(value: Any) -> str:
+    if type(value) is str:
+        return _encode_json_str(value)
+    return repr(value) if type(value) is int else _encode_json(value)
+
+
+def write_json_array(instances: Iterable[Dict], f) -> None:
+    """Write instances as json.dump(..., indent=2, ensure_ascii=False) would, one instance per write.
+
+    Flat instances are encoded field by field with the C string encoder; nested ones use json.dumps.
+    """
+    sep = "[\n"
+    for inst in instances:
+        f.write(sep)
+        if inst and all(type(k) is str and type(v) in _JSON_SCALARS for k, v in inst.items()):
+            fields = ",\n    ".join(_encode_json_str(k) + ": " + _encode_json_value(v) for k, v in inst.items())
+            f.write("  {\n    " + fields + "\n  }")
+        else:
+            f.write(textwrap.indent(json.dumps(inst, indent=2, ensure_ascii=False), "  "))
+        sep = ",\n"
+    f.write("\n]" if sep == ",\n" else "[]")
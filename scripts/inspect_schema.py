@@ -3,21 +3,33 @@
 
 import sqlite3
 import os
+from collections import defaultdict
+from pathlib import Path
 
 BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
 DATABASE_PATH = os.path.join(BASE_DIR, "data", "database", "chichewa_text2sql.db")
 
-conn = sqlite3.connect(DATABASE_PATH)
+# Read-only, immutable and memory-mapped: inspection never writes and nothing else changes the file
+conn = sqlite3.connect(Path(DATABASE_PATH).as_uri() + "?mode=ro&immutable=1", uri=True)
 cursor = conn.cursor()
+cursor.execute("PRAGMA mmap_size=268435456")
 
 tables = ['production', 'population', 'mse_daily', 'commodity_prices', 'food_insecurity']
 
+# Columns of every table in one query instead of one PRAGMA table_info per table
+columns_by_table = defaultdict(list)
+cursor.execute(
+    "SELECT m.name, p.name, p.type FROM sqlite_master m, pragma_table_info(m.name) p "
+    f"WHERE m.type = 'table' AND m.name IN ({', '.join('?' * len(tables))}) ORDER BY m.name, p.cid",
+    tables,
+)
+for table, name, col_type in cursor.fetchall():
+    columns_by_table[table].append((name, col_type))
+
 for table in tables:
     print(f"\n=== {table.upper()} ===")
-    cursor.execute(f"PRAGMA table_info({table})")
-    columns = cursor.fetchall()
-    for col in columns:
-        print(f"  {col[1]} ({col[2]})")
+    for name, col_type in columns_by_table[table]:
+        print(f"  {name} ({col_type})")
     
     # Sample data
     cursor.execute(f"SELECT * FROM {table} LIMIT 2")
@@ -1,18 +1,31 @@
 #!/usr/bin/env python3
 """Quick validation of corrected dataset."""
 
+import argparse
 import json
 import sqlite3
 import os
+from pathlib import Path
 
 BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
 DATABASE_PATH = os.path.join(BASE_DIR, "data", "database", "chichewa_text2sql.db")
 DATASET_PATH = os.path.join(BASE_DIR, "data", "train", "train_corrected.json")
 
+parser = argparse.ArgumentParser(description=__doc__)
+parser.add_argument("--full", action="store_true",
+                    help="execute every statement instead of only compiling it with EXPLAIN")
+args = parser.parse_args()
+
 # Load data
 data = json.load(open(DATASET_PATH, 'r', encoding='utf-8'))
-db = sqlite3.connect(DATABASE_PATH)
+# Read-only and immutable (no locking or change checks), memory-mapped, and every
+# statement runs inside one transaction
+db = sqlite3.connect(Path(DATABASE_PATH).as_uri() + "?mode=ro&immutable=1", uri=True, isolation_level=None)
 cursor = db.cursor()
+cursor.execute("PRAGMA mmap_size=268435456")
+cursor.execute("PRAGMA cache_size=-65536")
+cursor.execute("PRAGMA query_only=1")
+cursor.execute("BEGIN")
 
 valid = 0
 syntax_errors = 0
@@ -20,8 +33,12 @@ exec_errors = []
 
 for i, d in enumerate(data):
     try:
-        cursor.execute(d['sql_statement'])
-        result = cursor.fetchall()
+        if args.full:
+            cursor.execute(d['sql_statement'])
+            result = cursor.fetchall()
+        else:
+            # EXPLAIN compiles the statement (syntax, tables, columns) without running the query
+            cursor.execute("EXPLAIN " + d['sql_statement'])
         valid += 1
     except sqlite3.Error as e:
         syntax_errors += 1
@@ -32,13 +49,14 @@ for i, d in enumerate(data):
             'sql': d['sql_statement'][:100]
         })
 
+cursor.execute("COMMIT")
 db.close()
 
 print("=" * 60)
 print("CORRECTED DATASET VALIDATION")
 print("=" * 60)
 print(f"Total instances: {len(data)}")
-print(f"Valid (executable): {valid}")
+print(f"Valid ({'executable' if args.full else 'compiles'}): {valid}")
 print(f"Syntax/execution errors: {syntax_errors}")
 print(f"Success rate: {valid/len(data)*100:.2f}%")
 